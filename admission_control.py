@@ -0,0 +1,143 @@
+import asyncio
+import math
+import os
+import time
+from contextlib import asynccontextmanager
+
+
+class RejectedRequest(Exception):
+    """Raised when a request is refused by rate limiting or load shedding"""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+class SessionLocks:
+    """One asyncio lock per user so turns of the same session never interleave"""
+
+    def __init__(self):
+        self._locks = {}
+        self._waiters = {}
+
+    @asynccontextmanager
+    async def hold(self, user_id: str):
+        lock = self._locks.get(user_id)
+        if lock is None:
+            lock = self._locks[user_id] = asyncio.Lock()
+        self._waiters[user_id] = self._waiters.get(user_id, 0) + 1
+        try:
+            async with lock:
+                yield
+        finally:
+            # Drop the lock once nobody is queued on it so idle users don't leak
+            self._waiters[user_id] -= 1
+            if self._waiters[user_id] == 0:
+                del self._waiters[user_id]
+                del self._locks[user_id]
+
+    def active_sessions(self) -> int:
+        return len(self._locks)
+
+
+class UserRateLimiter:
+    """Token bucket per user: `rate_per_minute` sustained, `burst` at once"""
+
+    def __init__(self, rate_per_minute: float, burst: int):
+        self.rate = rate_per_minute / 60.0
+        self.burst = burst
+        self._buckets = {}
+
+    def check(self, user_id: str):
+        """Consume one token for the user or raise RejectedRequest"""
+        if self.rate <= 0:
+            return
+
+        now = time.monotonic()
+        tokens, last = self._buckets.get(user_id, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - last) * self.rate)
+
+        if tokens < 1:
+            self._buckets[user_id] = (tokens, now)
+            raise RejectedRequest("Rate limit exceeded", (1 - tokens) / self.rate)
+
+        self._buckets[user_id] = (tokens - 1, now)
+
+        # Full buckets carry no information, prune them now and then
+        if len(self._buckets) > 10000:
+            horizon = self.burst / self.rate
+            self._buckets = {
+                uid: (t, seen) for uid, (t, seen) in self._buckets.items()
+                if now - seen < horizon
+            }
+
+
+class AdmissionController:
+    """Caps in-flight LLM turns and sheds load once the wait queue is full.
+
+    At most `max_inflight` turns run at once and at most `max_queued` wait
+    for a slot; anything beyond that is rejected immediately with a
+    Retry-After estimate, so admitted requests keep a bounded queueing delay
+    instead of every request slowing down together.
+    """
+
+    def __init__(self, max_inflight: int, max_queued: int):
+        self.max_inflight = max_inflight
+        self.max_queued = max_queued
+        self._slots = asyncio.Semaphore(max_inflight)
+        self.inflight = 0
+        self.queued = 0
+        self.admitted = 0
+        self.shed = 0
+        # Moving average of turn duration, used for Retry-After hints
+        self.avg_service_time = 2.0
+
+    def retry_after(self) -> float:
+        backlog = self.inflight + self.queued
+        return self.avg_service_time * backlog / self.max_inflight
+
+    @asynccontextmanager
+    async def slot(self):
+        if self.queued >= self.max_queued and self.inflight >= self.max_inflight:
+            self.shed += 1
+            raise RejectedRequest("Server is busy", self.retry_after())
+
+        self.queued += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.queued -= 1
+
+        self.inflight += 1
+        self.admitted += 1
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - started
+            self.avg_service_time = 0.9 * self.avg_service_time + 0.1 * elapsed
+            self.inflight -= 1
+            self._slots.release()
+
+    def stats(self) -> dict:
+        return {
+            "inflight": self.inflight,
+            "queued": self.queued,
+            "max_inflight": self.max_inflight,
+            "max_queued": self.max_queued,
+            "admitted": self.admitted,
+            "shed": self.shed,
+            "avg_service_time": round(self.avg_service_time, 3)
+        }
+
+
+session_locks = SessionLocks()
+rate_limiter = UserRateLimiter(
+    rate_per_minute=float(os.getenv("USER_RATE_PER_MINUTE", "20")),
+    burst=int(os.getenv("USER_RATE_BURST", "5"))
+)
+admission_controller = AdmissionController(
+    max_inflight=int(os.getenv("MAX_INFLIGHT_LLM", "16")),
+    max_queued=int(os.getenv("MAX_QUEUED_LLM", "32"))
+)
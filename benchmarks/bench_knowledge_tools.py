@@ -0,0 +1,82 @@
+"""Per-call cost of the safety and app-help tools and of the phrase checks run on every turn.
+
+Each path is timed against the way it used to work: rebuilding the knowledge
+base dict on every call and scanning keyword lists with substring tests.
+
+Run from the repo root: python -m benchmarks.bench_knowledge_tools
+"""
+import copy
+import random
+import re
+import time
+
+from app_support_tool import APP_HELP_KNOWLEDGE, app_support_tool
+from marketplace_ai import IMAGE_REQUEST, TOPIC_PHRASES, TOPIC_SIGNALS
+from safety_policy_tool import SAFETY_KNOWLEDGE, safety_policy_tool
+
+CALLS = 20_000
+
+SAFETY_QUESTIONS = [
+    "what are the safety tips for meetups?", "how to pay safely?", "how do I avoid scams",
+    "what items are not allowed", "do I need proof of ownership", "is it ok to sell here"
+]
+HELP_QUESTIONS = [
+    "how do I create a listing?", "help me search for items", "how to contact a seller?",
+    "how do I edit my profile?", "delete my old ad", "what can this app do"
+]
+RESPONSES = [
+    "Great choice! Could you share a few photos of the sofa from different angles? 📸",
+    "Based on your budget of ₹15,000 here are some phones worth considering: " * 8,
+    "Meet in a public place and inspect the item before paying. " * 5,
+    "Please upload photos so I can check the condition."
+]
+IMAGE_PHRASES = [
+    'upload photo', 'upload image', 'take photo', 'share photo', 'send photo', 'show me photo',
+    'picture', 'pics', 'photograph', 'take pictures', 'send pictures', 'share images', '📸'
+]
+
+
+def legacy_lookup(data: dict, text: str):
+    """Rebuild the knowledge base, then test rules in order with substring checks"""
+    data = copy.deepcopy(data)
+    text = text.lower().strip()
+    for rule in data["rules"]:
+        if any(word.rstrip("*") in text for word in rule["keywords"]):
+            return rule["answer"]
+    return data["default"]
+
+
+def per_call(fn, items: list) -> float:
+    started = time.perf_counter()
+    for item in items:
+        fn(item)
+    return (time.perf_counter() - started) / len(items) * 1e6
+
+
+def main():
+    rng = random.Random(7)
+    safety = [rng.choice(SAFETY_QUESTIONS) for _ in range(CALLS)]
+    helps = [rng.choice(HELP_QUESTIONS) for _ in range(CALLS)]
+    responses = [rng.choice(RESPONSES) for _ in range(CALLS)]
+    topic_regexes = {
+        topic: re.compile(r"\b(" + "|".join(map(re.escape, phrases)) + r")\b")
+        for topic, phrases in TOPIC_PHRASES.items()
+    }
+
+    rows = [
+        ("safety_policy_tool", per_call(safety_policy_tool, safety),
+         per_call(lambda q: legacy_lookup(SAFETY_KNOWLEDGE, q), safety)),
+        ("app_support_tool", per_call(app_support_tool, helps),
+         per_call(lambda q: legacy_lookup(APP_HELP_KNOWLEDGE, q), helps)),
+        ("needs_images check", per_call(IMAGE_REQUEST.search, responses),
+         per_call(lambda r: any(phrase in r.lower() for phrase in IMAGE_PHRASES), responses)),
+        ("topic signals", per_call(TOPIC_SIGNALS.labels, helps),
+         per_call(lambda q: [t for t, p in topic_regexes.items() if p.search(q.lower())], helps))
+    ]
+    print(f"{'path':<22}{'now':>10}{'before':>10}")
+    for name, now, before in rows:
+        print(f"{name:<22}{now:>8.2f}us{before:>8.2f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Saved-search percolation: ingest cost, memory and per-listing match latency at scale.
+
+Run from the repo root: python -m benchmarks.bench_percolator
+"""
+import random
+import resource
+import time
+
+from percolator import Percolator, listing_terms
+from search_parser_tool import BRANDS, CATEGORIES, LOCATION_KEYWORDS
+
+SEARCHES = 1_000_000
+LISTINGS = 10_000
+SCAN_LISTINGS = 20
+
+CONDITIONS = ["any"] * 6 + ["new", "used", "excellent", "good"]
+LOCATIONS = [None] * 3 + ["near me"] + LOCATION_KEYWORDS * 2
+MODELS = [f"{letter}{number}" for letter in "asxmgzkp" for number in range(1, 100)]
+EXTRA_WORDS = ["gaming", "wooden", "pro", "mini", "kids", "leather", "steel", "vintage", "smart", "portable"]
+
+
+def synthetic_searches(rng: random.Random, count: int) -> list:
+    """search_parser_tool-shaped dicts, built directly to leave out parser cost"""
+    words = list(CATEGORIES)
+    searches = []
+    for _ in range(count):
+        word = rng.choice(words)
+        keywords = [word]
+        if rng.random() < 0.5:
+            keywords.append(rng.choice(BRANDS))
+        if rng.random() < 0.6:
+            keywords.append(rng.choice(MODELS))
+        if rng.random() < 0.3:
+            keywords.append(rng.choice(EXTRA_WORDS))
+        price_max = rng.choice([None, None, rng.lognormvariate(9.5, 1.2)])
+        price_min = rng.choice([None, None, None, (price_max or 50000) * rng.uniform(0.2, 0.8)])
+        searches.append({
+            "category": CATEGORIES[word] if rng.random() < 0.8 else None,
+            "price_min": price_min,
+            "price_max": price_max,
+            "condition": rng.choice(CONDITIONS),
+            "location": rng.choice(LOCATIONS),
+            "keywords": keywords if rng.random() < 0.98 else []
+        })
+    return searches
+
+
+def synthetic_listing(rng: random.Random) -> dict:
+    word = rng.choice(list(CATEGORIES))
+    return {
+        "category": CATEGORIES[word],
+        "price": rng.lognormvariate(9.5, 1.2),
+        "condition": rng.choice(["new", "excellent", "good", "fair"]),
+        "location": rng.choice(LOCATION_KEYWORDS),
+        "text": " ".join([rng.choice(BRANDS), word, rng.choice(MODELS), rng.choice(EXTRA_WORDS),
+                          "in great shape, barely used"])
+    }
+
+
+def percentile(values: list, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[int(q * (len(ordered) - 1))]
+
+
+def max_rss_mib() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    rng = random.Random(11)
+    searches = synthetic_searches(rng, SEARCHES)
+    before = max_rss_mib()
+
+    single = Percolator()
+    sample = searches[:50_000]
+    started = time.perf_counter()
+    for parsed in sample:
+        single.add(parsed)
+    print(f"add, one at a time             {(time.perf_counter() - started) / len(sample) * 1e6:>7.1f} us/search")
+
+    index = Percolator()
+    started = time.perf_counter()
+    index.add_batch(searches)
+    elapsed = time.perf_counter() - started
+    print(f"add_batch {len(index)} searches  {elapsed:>7.2f} s ({elapsed / len(index) * 1e6:.1f} us/search), "
+          f"{len(index.buckets)} buckets")
+    print(f"max RSS growth                 {max_rss_mib() - before:>7.0f} MiB")
+
+    listings = [synthetic_listing(rng) for _ in range(LISTINGS)]
+    timings = []
+    total = 0
+    for listing in listings:
+        started = time.perf_counter()
+        total += len(index.match(listing))
+        timings.append((time.perf_counter() - started) * 1e6)
+    print(f"\nmatch p50 / p99                {percentile(timings, 0.5):>7.0f} / {percentile(timings, 0.99):.0f} us, "
+          f"{total / len(listings):.1f} matches per listing")
+
+    # Reference: test every search against the listing
+    started = time.perf_counter()
+    for listing in listings[:SCAN_LISTINGS]:
+        terms = listing_terms(" ".join((listing["text"], listing["category"], listing["location"])))
+        price = listing["price"]
+        scanned = [
+            search_id for search_id, record in index.searches.items()
+            if record[3] <= price <= record[4]
+            and index._matches(record, listing["category"], listing["condition"], listing["location"], terms)
+        ]
+    scan = (time.perf_counter() - started) / SCAN_LISTINGS * 1e6
+    assert sorted(scanned) == sorted(index.match(listings[SCAN_LISTINGS - 1]))
+    print(f"linear scan, per listing       {scan:>7.0f} us")
+
+
+if __name__ == "__main__":
+    main()
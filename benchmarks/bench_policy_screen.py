@@ -0,0 +1,86 @@
+"""Per-call latency of the local prohibited-item screen.
+
+Run from the repo root: python -m benchmarks.bench_policy_screen
+"""
+import time
+
+from policy_screen import PolicyScreen, screen_item
+
+MESSAGES = [
+    "I want to sell my Samsung Galaxy S21, 2 years old, 128GB, minor scratches",
+    "Selling a wooden study table with chair, excellent condition, Bangalore",
+    "It comes with the original box, charger and two back covers",
+    "Selling Nike Air Jordan first copy size 9",
+    "selling 6 sealed bottles of imported whisky",
+    "selling my old nerf gun and toy cars for kids",
+    "Golden retriever puppies available, vaccinated",
+    "selling marijuna 10g",
+    "Royal Enfield Bullet 350, 2019 model, 20000 km driven, petrol bike",
+    "",
+    "selling 20 litres of petrol",
+    "3 bottles of wine, unopened",
+    "Labrador puppy for sale",
+    "Persian kittens for sale",
+    "2 strips of medicine, unopened",
+]
+
+# Ordinary listings that mention a lexicon word and must pass
+EXPECTED_OK = [
+    "Selling my Maruti Swift 2017 petrol, 40000 km",
+    "petrol, 40000 km driven",
+    "my iPhone 12, not stolen, I have the bill",
+    "wine coloured saree",
+    "old beer fridge",
+    "stroller, perfect for a puppy walk",
+    "prescription glasses frame, barely used",
+    "woolen mittens for kids",
+    "lego pirate ship",
+    "Pirates of the Caribbean DVD set",
+    "kitten heels",
+    "Ford Escort 1998",
+    "Escorts tractor 2015",
+    "Parrot Bebop drone",
+    "Torrent 2019 bicycle",
+    "Cipla medicine strips"
+]
+
+# Listings that must still be caught
+EXPECTED_BLOCKED = [
+    "selling marijuna 10g", "Persian kittens for sale", "escort service available",
+    "2 strips of medicine", "parrot for sale", "torrent links for new movies",
+    "Golden retriever puppies available, vaccinated"
+]
+
+
+def bench(label: str, fn, iterations: int):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        for message in MESSAGES:
+            fn(message)
+    elapsed = time.perf_counter() - started
+    per_call = elapsed / (iterations * len(MESSAGES)) * 1e6
+    print(f"{label:<28}{per_call:>8.2f} us/call")
+
+
+def main():
+    started = time.perf_counter()
+    PolicyScreen()
+    print(f"{'compile lexicon':<28}{(time.perf_counter() - started) * 1e3:>8.2f} ms")
+
+    bench("screen_item", screen_item, 20000)
+
+    for message in EXPECTED_OK:
+        assert screen_item(message) is None, f"false positive: {message!r} -> {screen_item(message)}"
+    print(f"{len(EXPECTED_OK)} expected-ok listings pass")
+    for message in EXPECTED_BLOCKED:
+        assert screen_item(message), f"missed: {message!r}"
+    print(f"{len(EXPECTED_BLOCKED)} expected-blocked listings are caught")
+
+    print()
+    for message in MESSAGES:
+        hit = screen_item(message)
+        print(f"{'BLOCK' if hit else 'ok':<6}{message[:60]!r:<64}{hit['item'] if hit else ''}")
+
+
+if __name__ == "__main__":
+    main()
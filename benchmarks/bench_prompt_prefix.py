@@ -0,0 +1,55 @@
+"""Bytes and estimated tokens sent per turn with and without the static prompt split.
+
+Run from the repo root: python -m benchmarks.bench_prompt_prefix
+"""
+import os
+
+os.environ["LLM_BACKEND"] = "local"
+
+from local_backend import backend_stats, reset_stats
+from marketplace_ai import MarketplaceAI
+
+CONVERSATIONS = {
+    "selling": [
+        "I want to sell my Samsung Galaxy S21",
+        "It is 2 years old, 128GB, black",
+        "Minor scratches on the back, screen is perfect",
+        "I have the box and charger",
+        "What price should I ask?"
+    ],
+    "buying": [
+        "I want to buy a laptop",
+        "My budget is under 60k",
+        "Mostly for programming and some light gaming",
+        "I prefer Lenovo or Dell",
+        "16GB RAM at least",
+        "Battery life matters a lot"
+    ],
+    "support": [
+        "Is it safe to pay by UPI before meeting?",
+        "How do I edit my listing?",
+        "Hello there"
+    ]
+}
+
+
+def main():
+    print(f"{'flow':<10}{'turns':>6}{'calls':>7}{'inline B/turn':>15}{'split B/turn':>14}{'saved tok/turn':>16}")
+    for flow, messages in CONVERSATIONS.items():
+        ai = MarketplaceAI()
+        reset_stats()
+        for message in messages:
+            ai.run(message, user_id=flow)
+
+        turns = len(messages)
+        inline = backend_stats["inline_bytes"] / turns
+        split = backend_stats["request_bytes"] / turns
+        # Same four-bytes-per-token estimate the local backend uses
+        saved_tokens = (inline - split) / 4
+        print(f"{flow:<10}{turns:>6}{backend_stats['calls']:>7}{inline:>15.0f}{split:>14.0f}{saved_tokens:>16.0f}")
+
+    print(f"\nstatic system instructions for the last flow, set once per model: {backend_stats['system_bytes']} bytes")
+
+
+if __name__ == "__main__":
+    main()
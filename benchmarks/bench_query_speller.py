@@ -0,0 +1,71 @@
+"""Typo correction cost per query, per keystroke and in batch, against a linear scan.
+
+Run from the repo root: python -m benchmarks.bench_query_speller
+"""
+import random
+import string
+import time
+
+from search_parser_tool import build_query_speller
+from spell_index import edit_distance
+
+QUERIES = [
+    "iphon under 20k", "sofaa", "samsng galaxy phone under 15k", "wooden tabel near me",
+    "macbok pro", "badmintn racket", "refurbishd lenovo laptop", "cheap bicycel in pune",
+    "nike sneakrs size 9", "study chiar for kids", "washing machne whirlpool", "royal enfeild bike"
+]
+MINED_WORDS = 20_000
+
+
+def typo(word: str, rng: random.Random) -> str:
+    i = rng.randrange(1, len(word))
+    return word[:i] + rng.choice(string.ascii_lowercase) + word[i + 1:]
+
+
+def per_call(fn, items, repeat: int = 1) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for item in items:
+            fn(item)
+    return (time.perf_counter() - started) / (len(items) * repeat) * 1e6
+
+
+def main():
+    rng = random.Random(3)
+    speller = build_query_speller()
+    curated = len(speller.counts)
+    # Stand-in for brand, model and title words mined from listings
+    for _ in range(MINED_WORDS):
+        speller.add("".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 10))))
+    print(f"vocabulary: {curated} curated + {len(speller.counts) - curated} mined words, "
+          f"{len(speller.deletes)} delete keys")
+
+    for query in QUERIES[:6]:
+        print(f"  {query!r:<34} -> {speller.correct(query)!r}")
+
+    words = sorted(speller.counts)
+    fresh = [typo(rng.choice(words), rng) for _ in range(2000)]
+    speller._corrections.clear()
+    print(f"\nnew misspelled word        {per_call(speller.correct_token, fresh):>8.1f} us")
+    print(f"repeat misspelled word     {per_call(speller.correct_token, fresh):>8.2f} us")
+
+    keystrokes = [query[:i] for query in QUERIES for i in range(1, len(query) + 1)]
+    speller._corrections.clear()
+    print(f"every keystroke, cold      {per_call(speller.correct, keystrokes):>8.1f} us/keystroke")
+    print(f"every keystroke, warm      {per_call(speller.correct, keystrokes, repeat=5):>8.1f} us/keystroke")
+
+    batch = [rng.choice(QUERIES) for _ in range(10_000)]
+    started = time.perf_counter()
+    speller.correct_batch(batch)
+    print(f"batch of {len(batch)} queries    {(time.perf_counter() - started) * 1000:>8.1f} ms")
+
+    sample = fresh[:20]
+    started = time.perf_counter()
+    for token in sample:
+        min(words, key=lambda word: edit_distance(token, word, 2))
+    scan = (time.perf_counter() - started) / len(sample) * 1e6
+    print(f"\nlinear scan, per word      {scan:>8.0f} us")
+
+
+if __name__ == "__main__":
+    main()
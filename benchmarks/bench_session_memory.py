@@ -0,0 +1,90 @@
+"""Memory held by 10k chat sessions as plain dicts, compact messages, and compacted idle sessions.
+
+Run from the repo root: python -m benchmarks.bench_session_memory
+"""
+import gc
+import random
+import time
+import tracemalloc
+
+from session_history import SessionHistory, compact_idle_sessions
+
+SESSIONS = 10_000
+TURNS = 10
+
+USER_MESSAGES = [
+    "I want to buy a laptop under {n}",
+    "Is a {n} GB phone enough for gaming?",
+    "Selling my Royal Enfield, {n} km driven",
+    "What price should I ask for a {n} year old fridge?",
+    "How do I edit my listing number {n}?"
+]
+
+REPLY_PARAGRAPHS = [
+    "**Great choice!** Based on what you've told me, here are a few options worth a look. "
+    "The Lenovo IdeaPad Slim 5 is around ₹{n} and has a great keyboard for long coding sessions.",
+    "📸 **Photos matter:** take pictures in daylight, show any scratches honestly, and include the "
+    "box and charger. Listings with 5+ photos sell noticeably faster.",
+    "💰 **Pricing:** similar items in your area have sold for ₹{n} to ₹{m}. Given the condition you "
+    "described, I'd list at the upper end and leave a little room for negotiation.",
+    "🛡️ **Stay safe:** meet in a public place, check the item before paying, and never share OTPs "
+    "or pay advance amounts to unknown sellers.",
+    "Would you like me to compare battery life, or focus on performance for your budget of ₹{n}?"
+]
+
+
+def build_sessions(make_history, add):
+    rng = random.Random(7)
+    sessions = {}
+    for session_id in range(SESSIONS):
+        history = make_history()
+        for _ in range(TURNS):
+            n = rng.randint(1, 90000)
+            add(history, "user", rng.choice(USER_MESSAGES).format(n=n))
+            paragraphs = rng.sample(REPLY_PARAGRAPHS, 4)
+            add(history, "assistant", "\n\n".join(p.format(n=n, m=n + rng.randint(500, 5000)) for p in paragraphs))
+        sessions[f"user-{session_id}"] = history
+    return sessions
+
+
+def measure(label: str, build):
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    sessions = build()
+    elapsed = time.perf_counter() - started
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<32}{current / 2**20:>10.1f} MiB{elapsed:>10.2f} s")
+    return sessions
+
+
+def build_dicts():
+    return build_sessions(list, lambda history, role, content: history.append({"role": role, "content": content}))
+
+
+def build_compact():
+    return build_sessions(SessionHistory, SessionHistory.add)
+
+
+def build_compacted():
+    sessions = build_compact()
+    compact_idle_sessions(sessions, idle_seconds=0)
+    return sessions
+
+
+def main():
+    print(f"{SESSIONS} sessions x {TURNS} turns")
+    print(f"{'representation':<32}{'memory':>14}{'build':>12}")
+    measure("dict per message", build_dicts)
+    measure("Message (__slots__)", build_compact)
+    sessions = measure("Message, idle sessions packed", build_compacted)
+
+    history = sessions["user-0"]
+    started = time.perf_counter()
+    history.touch()
+    print(f"\nreactivating one packed session: {(time.perf_counter() - started) * 1e6:.0f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Autocomplete latency, update cost, and serialized size and load time of the suggest index.
+
+Run from the repo root: python -m benchmarks.bench_suggest
+"""
+import json
+import random
+import time
+
+from search_parser_tool import BRANDS, CATEGORIES
+from suggest_index import SuggestIndex
+
+PHRASES = 200_000
+LOOKUPS = 50_000
+
+QUALIFIERS = ["", "used", "new", "cheap", "second hand", "gaming", "wooden", "kids", "pro", "mini"]
+MODELS = [f"{letter}{number}" for letter in "asxmgz" for number in range(1, 60)]
+
+
+def synthetic_queries(rng: random.Random) -> dict:
+    """Zipf-weighted query phrases shaped like marketplace searches"""
+    words = list(CATEGORIES)
+    weights = {}
+    while len(weights) < PHRASES:
+        phrase = " ".join(part for part in (
+            rng.choice(QUALIFIERS), rng.choice(BRANDS), rng.choice(words), rng.choice(MODELS + [""] * 20)
+        ) if part)
+        weights[phrase] = 1000.0 / (1 + len(weights)) ** 0.8 + rng.random()
+    return weights
+
+
+def percentile(values: list, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[int(q * (len(ordered) - 1))]
+
+
+def main():
+    rng = random.Random(5)
+    weights = synthetic_queries(rng)
+
+    index = SuggestIndex()
+    started = time.perf_counter()
+    index.build(weights)
+    print(f"build {len(index)} phrases        {time.perf_counter() - started:>8.2f} s, "
+          f"{len(index.tops)} precomputed prefixes")
+
+    phrases = index.phrases
+    prefixes = []
+    for _ in range(LOOKUPS):
+        phrase = rng.choice(phrases)
+        prefixes.append(phrase[:rng.randint(1, min(len(phrase), 16))])
+    timings = []
+    for prefix in prefixes:
+        started = time.perf_counter()
+        index.suggest(prefix)
+        timings.append((time.perf_counter() - started) * 1e6)
+    print(f"suggest p50 / p99 / max        {percentile(timings, 0.5):>6.1f} / {percentile(timings, 0.99):.1f} / "
+          f"{max(timings):.0f} us")
+
+    updates = [rng.choice(phrases) if rng.random() < 0.7 else f"{rng.choice(BRANDS)} new item {i}"
+               for i in range(10_000)]
+    started = time.perf_counter()
+    for phrase in updates:
+        index.add(phrase)
+    print(f"add (70% existing)             {(time.perf_counter() - started) / len(updates) * 1e6:>6.1f} us")
+
+    data = index.to_bytes()
+    as_json = json.dumps({"weights": index.weights, "tops": index.tops}).encode("utf-8")
+    started = time.perf_counter()
+    loaded = SuggestIndex.from_bytes(data)
+    load_time = time.perf_counter() - started
+    assert loaded.suggest("sa") == index.suggest("sa")
+    print(f"\nserialized                     {len(data) / 2**20:>6.2f} MiB  (JSON: {len(as_json) / 2**20:.2f} MiB)")
+    print(f"load                           {load_time * 1000:>6.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
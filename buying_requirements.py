@@ -0,0 +1,102 @@
+from search_parser_tool import CATEGORIES
+
+ANY_LOCATION = {"near me", "nearby", "local"}
+
+
+class BuyingRequirements:
+    """What a buyer has asked for so far, filled in one message at a time.
+
+    Each user message is parsed by search_parser_tool as it arrives and
+    merged in: single-valued slots (item, budget, condition, location) take
+    the latest value, while brands and specs accumulate. A change of item
+    clears the brands and specs that belonged to the old one. Once the item,
+    the budget and at least one preference are known, the conversation has
+    enough to recommend from without asking the model to re-read it. An
+    item that was only inferred by the typo corrector is kept but does not
+    count until the user types it.
+    """
+
+    def __init__(self):
+        self.item = None
+        self.item_typed = False
+        self.category = None
+        self.budget_min = None
+        self.budget = None
+        self.brands = []
+        self.specs = []
+        self.condition = None
+        self.location = None
+        self.turns = 0
+
+    def update(self, parsed: dict):
+        """Merge one parsed user message into the record"""
+        self.turns += 1
+        item = parsed.get("item")
+        typed = item not in (parsed.get("corrections") or {}).values()
+        if item and item != self.item:
+            if self.item and CATEGORIES.get(item) != self.category:
+                self.brands, self.specs = [], []
+            self.item = item
+            self.item_typed = typed
+            self.category = parsed.get("category") or CATEGORIES.get(item)
+        elif item:
+            self.item_typed = self.item_typed or typed
+        if parsed.get("budget"):
+            self.budget = parsed["budget"]
+            self.budget_min = parsed.get("price_min")
+        if parsed.get("brand") and parsed["brand"] not in self.brands:
+            self.brands.append(parsed["brand"])
+        for spec in parsed.get("specs") or []:
+            if spec not in self.specs:
+                self.specs.append(spec)
+        if parsed.get("condition") not in (None, "any"):
+            self.condition = parsed["condition"]
+        if parsed.get("location"):
+            self.location = parsed["location"]
+
+    def missing(self) -> list:
+        """Slots still needed before recommending"""
+        missing = [slot for slot in ("item", "budget") if getattr(self, slot) is None]
+        if self.item and not self.item_typed:
+            missing.insert(0, "item")
+        if not (self.brands or self.specs or self.condition):
+            missing.append("preference")
+        return missing
+
+    def ready(self) -> bool:
+        return not self.missing()
+
+    def describe(self) -> str:
+        """The requirements as one line, in the form ITEM_EXTRACTION produces"""
+        parts = []
+        if self.budget:
+            low = f"₹{self.budget_min:,} - " if self.budget_min else "up to "
+            parts.append(f"Budget: {low}₹{self.budget:,}")
+        if self.brands:
+            parts.append(f"Brand: {', '.join(self.brands)}")
+        if self.specs:
+            parts.append(f"Specifications: {', '.join(self.specs)}")
+        if self.condition:
+            parts.append(f"Condition: {self.condition}")
+        if self.location:
+            where = "near the buyer" if self.location in ANY_LOCATION else self.location.title()
+            parts.append(f"Location: {where}")
+        return "; ".join(parts) or "None stated"
+
+    def extraction(self) -> str:
+        """Stand-in for the ITEM_EXTRACTION answer, built from the slots"""
+        return f"Item Type: {self.item}\nRequirements: {self.describe()}"
+
+    def to_dict(self) -> dict:
+        return {
+            "item": self.item,
+            "item_typed": self.item_typed,
+            "category": self.category,
+            "budget_min": self.budget_min,
+            "budget": self.budget,
+            "brands": list(self.brands),
+            "specs": list(self.specs),
+            "condition": self.condition,
+            "location": self.location,
+            "missing": self.missing()
+        }
@@ -0,0 +1,106 @@
+import os
+import threading
+import time
+from collections import deque
+
+
+class CircuitOpen(Exception):
+    """Raised instead of calling a backend that is known to be failing"""
+
+
+class CircuitBreaker:
+    """Error- and latency-driven breaker around the LLM backend.
+
+    The last `window` calls are kept as good/bad outcomes; a call is bad if
+    it raised or took longer than `slow_call_seconds`. Once at least
+    `min_calls` are recorded and the bad share reaches `failure_ratio` the
+    breaker opens and callers fail fast for `reset_seconds`. After that a
+    single probe call is let through: success closes the breaker, failure
+    opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, window: int = 20, min_calls: int = 5, failure_ratio: float = 0.5,
+                 slow_call_seconds: float = 10.0, reset_seconds: float = 30.0):
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_ratio = failure_ratio
+        self.slow_call_seconds = slow_call_seconds
+        self.reset_seconds = reset_seconds
+        self.outcomes = deque(maxlen=window)
+        self.state = self.CLOSED
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self.rejected = 0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Raise CircuitOpen unless a call may go to the backend now"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_seconds:
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return
+            self.rejected += 1
+        raise CircuitOpen("LLM backend circuit is open")
+
+    def record_success(self, elapsed: float):
+        if elapsed > self.slow_call_seconds:
+            self.record_failure()
+            return
+        with self._lock:
+            self.outcomes.append(True)
+            if self.state == self.HALF_OPEN:
+                self._close()
+
+    def record_failure(self):
+        with self._lock:
+            self.outcomes.append(False)
+            if self.state == self.HALF_OPEN:
+                self._open()
+            elif self.state == self.CLOSED and len(self.outcomes) >= self.min_calls:
+                bad = self.outcomes.count(False)
+                if bad / len(self.outcomes) >= self.failure_ratio:
+                    self._open()
+
+    def release_probe(self):
+        """Give up a probe slot whose call ended without an outcome"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def _open(self):
+        self.state = self.OPEN
+        self.opened_at = time.monotonic()
+        self.times_opened += 1
+        self._probe_in_flight = False
+
+    def _close(self):
+        self.state = self.CLOSED
+        self.outcomes.clear()
+        self._probe_in_flight = False
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "state": self.state,
+                "recent_calls": len(self.outcomes),
+                "recent_failures": self.outcomes.count(False),
+                "times_opened": self.times_opened,
+                "rejected": self.rejected
+            }
+
+
+llm_breaker = CircuitBreaker(
+    window=int(os.getenv("LLM_BREAKER_WINDOW", "20")),
+    min_calls=int(os.getenv("LLM_BREAKER_MIN_CALLS", "5")),
+    failure_ratio=float(os.getenv("LLM_BREAKER_FAILURE_RATIO", "0.5")),
+    slow_call_seconds=float(os.getenv("LLM_SLOW_CALL_SECONDS", "10")),
+    reset_seconds=float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30"))
+)
@@ -16,5 +16,8 @@ class ConversationManager:
         if user_id not in self.user_sessions:
             self.user_sessions[user_id] = {"state": "initial", "listing_data": {}, "questions_asked": [], "current_step": 0}
         self.user_sessions[user_id].update(data)
+    
+    def reset_session(self, user_id):
+        self.user_sessions.pop(user_id, None)
 
 conversation_manager = ConversationManager()
@@ -0,0 +1,83 @@
+import os
+import threading
+from collections import OrderedDict
+from app_support_tool import app_support_tool
+from safety_policy_tool import safety_policy_tool
+
+# Intents whose answers depend only on the question, not on the session
+CACHEABLE_INTENTS = {'SAFETY', 'APP_HELP', 'GENERAL'}
+
+UNAVAILABLE_NOTE = "⚡ *I'm answering from my quick guide while our assistant is busy. Ask again in a minute for a fuller answer.*"
+
+
+class AnswerCache:
+    """Recent model answers to stateless questions, served when the model is unavailable"""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.served = 0
+        self._lock = threading.Lock()
+
+    def key(self, intent: str, user_query: str) -> tuple:
+        return intent, " ".join(user_query.lower().split())
+
+    def put(self, intent: str, user_query: str, answer: str):
+        if intent not in CACHEABLE_INTENTS:
+            return
+        with self._lock:
+            key = self.key(intent, user_query)
+            self.entries[key] = answer
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def get(self, intent: str, user_query: str):
+        with self._lock:
+            answer = self.entries.get(self.key(intent, user_query))
+            if answer is not None:
+                self.served += 1
+            return answer
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self.entries), "served": self.served}
+
+
+def format_guide(title: str, lines: list, footer: str = "") -> str:
+    # Plain sentences get bullets, pre-formatted lines are kept as they are
+    text = f"**{title}**\n\n" + "\n".join(f"• {line}" if line[:1].isalpha() else line for line in lines)
+    if footer:
+        text += f"\n\n{footer}"
+    return text
+
+
+def fallback_response(intent: str, user_query: str) -> str:
+    """Answer a turn without the model, from cached answers and the local tools"""
+    cached = answer_cache.get(intent, user_query)
+    if cached is not None:
+        return cached
+
+    if intent == 'SAFETY':
+        guide = safety_policy_tool(user_query)
+        if "content" in guide:
+            body = format_guide(guide["topic"], guide["content"], guide["summary"])
+        else:
+            body = (
+                format_guide("✅ Allowed items", guide["allowed_items"]) + "\n\n" +
+                format_guide("🚫 Not allowed", guide["disallowed_items"], guide["summary"])
+            )
+    elif intent in ('APP_HELP', 'SELL', 'BUY'):
+        # Selling and buying questions get the matching how-to guide
+        action = {'SELL': "create listing", 'BUY': "search items"}.get(intent, user_query)
+        guide = app_support_tool(action)
+        body = format_guide(guide["action"], guide["steps"], guide["tip"])
+    else:
+        body = (
+            "👋 I'm here to help you buy, sell and stay safe on the marketplace. "
+            "Tell me what you're selling or looking for!"
+        )
+    return f"{body}\n\n{UNAVAILABLE_NOTE}"
+
+
+answer_cache = AnswerCache(max_entries=int(os.getenv("ANSWER_CACHE_SIZE", "1024")))
@@ -1,38 +1,266 @@
 import google.generativeai as genai
 import os
+import json
+import logging
 from dotenv import load_dotenv
 import asyncio
+import threading
+import time
 from concurrent.futures import ThreadPoolExecutor
+from turn_context import DeadlineExceeded, GenerationCancelled, current_turn
+from circuit_breaker import CircuitOpen, llm_breaker
+from local_backend import LocalModel
+from usage_meter import estimate_image_tokens, estimate_tokens, usage_meter
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = 'gemini-2.0-flash'
+GENERATION_CONFIG = {
+    "temperature": 0.7,
+    "top_p": 0.8,
+    "top_k": 40,
+    "max_output_tokens": 2048,
+}
+
+# Context caches are created against a pinned model version. A profile can
+# name it with "cache_model"; otherwise it is looked up here, and models with
+# no entry are not cached
+CACHE_MODELS = {
+    "gemini-2.0-flash": "gemini-2.0-flash-001",
+    "gemini-2.0-flash-lite": "gemini-2.0-flash-lite-001"
+}
+CONTEXT_CACHE_TTL = int(os.getenv("GEMINI_CONTEXT_CACHE_TTL", "3600"))
+# A model built on a cache is rebuilt, with a fresh cache, this long before the cache expires
+CONTEXT_CACHE_REFRESH = min(300, CONTEXT_CACHE_TTL // 10)
+
+# Call-site profiles: which model, output cap, temperature and timeout each
+# kind of call gets. "deadline_share" caps a call at that share of the
+# turn's remaining time, leaving room for the calls chained after it. Override per profile with GEMINI_PROFILES (JSON) or a
+# JSON file at GEMINI_PROFILES_PATH, e.g. {"intent": {"model": "gemini-2.0-flash"}}
+DEFAULT_PROFILES = {
+    "default": {"model": MODEL_NAME, "max_output_tokens": 2048, "temperature": 0.7, "timeout": 60, "deadline_share": 1.0},
+    "intent": {"model": "gemini-2.0-flash-lite", "max_output_tokens": 5, "temperature": 0.0, "timeout": 5, "deadline_share": 0.2},
+    "extraction": {"model": "gemini-2.0-flash-lite", "max_output_tokens": 256, "temperature": 0.1, "timeout": 10, "deadline_share": 0.25},
+    "conversation": {"model": MODEL_NAME, "max_output_tokens": 1024, "temperature": 0.7, "timeout": 30},
+    "product_search": {"model": MODEL_NAME, "max_output_tokens": 1536, "temperature": 0.4, "timeout": 30, "deadline_share": 0.5},
+    "recommendation": {"model": MODEL_NAME, "max_output_tokens": 2048, "temperature": 0.7, "timeout": 45},
+    "listing_conversation": {"model": MODEL_NAME, "max_output_tokens": 512, "temperature": 0.5, "timeout": 20},
+    "listing_json": {"model": MODEL_NAME, "max_output_tokens": 1024, "temperature": 0.3, "timeout": 30},
+    # Applied on top of any profile for users over their daily token budget
+    "budget": {"model": "gemini-2.0-flash-lite", "max_output_tokens": 512}
+}
+
+
+def load_profiles() -> dict:
+    """Default profiles merged with any overrides from the environment"""
+    overrides = {}
+    path = os.getenv("GEMINI_PROFILES_PATH")
+    try:
+        if path:
+            with open(path) as f:
+                overrides.update(json.load(f))
+        if os.getenv("GEMINI_PROFILES"):
+            overrides.update(json.loads(os.getenv("GEMINI_PROFILES")))
+    except Exception as e:
+        logger.error(f"Ignoring invalid Gemini profile overrides: {str(e)}")
+        overrides = {}
+
+    profiles = {}
+    for name in set(DEFAULT_PROFILES) | set(overrides):
+        profile = dict(DEFAULT_PROFILES["default"])
+        profile.update(DEFAULT_PROFILES.get(name, {}))
+        profile.update(overrides.get(name, {}))
+        profiles[name] = profile
+    return profiles
+
+
+class LLMUnavailable(Exception):
+    """The model gave no answer: it failed, timed out, or its circuit is open"""
+
 class GeminiWrapper:
     def __init__(self):
-        api_key = os.getenv("GOOGLE_API_KEY") or os.getenv("GEMINI_API_KEY")
-        genai.configure(api_key=api_key)
-        
+        # LLM_BACKEND=local swaps in the offline stand-in for benchmarks and replay
+        self.backend = os.getenv("LLM_BACKEND", "gemini")
+        if self.backend == "local":
+            self.model_class = LocalModel
+        else:
+            api_key = os.getenv("GOOGLE_API_KEY") or os.getenv("GEMINI_API_KEY")
+            genai.configure(api_key=api_key)
+            self.model_class = genai.GenerativeModel
+
+        self.profiles = load_profiles()
+
+        # One model per profile and static system instruction, built on first
+        # use and, when it sits on a context cache, again before the cache expires
+        self.use_context_cache = os.getenv("GEMINI_CONTEXT_CACHE", "0") == "1"
+        self._models = {}
+        self._models_lock = threading.Lock()
+
         # Use newer model for better reasoning
-        self.model = genai.GenerativeModel(
-            'gemini-2.0-flash',
-            generation_config={
-                "temperature": 0.7,
-                "top_p": 0.8,
-                "top_k": 40,
-                "max_output_tokens": 2048,
-            }
-        )
-        
+        self.model = self.model_for("default")
+
         # Thread pool for async operations
         self.executor = ThreadPoolExecutor(max_workers=2)
-    
-    def generate_response(self, prompt: str) -> str:
-        """Synchronous response generation"""
+
+    def get_profile(self, name: str, degraded: bool = False) -> dict:
+        profile = self.profiles.get(name) or self.profiles["default"]
+        if degraded:
+            # Cheaper model and shorter answers, same temperature and timeout
+            budget = self.profiles["budget"]
+            profile = dict(profile)
+            profile["model"] = budget["model"]
+            profile["cache_model"] = budget.get("cache_model")
+            profile["max_output_tokens"] = min(profile["max_output_tokens"], budget["max_output_tokens"])
+        return profile
+
+    def _build_model(self, profile: dict, system_instruction: str = None) -> tuple:
+        """The model and the monotonic time it must be rebuilt by"""
+        generation_config = dict(GENERATION_CONFIG)
+        generation_config["temperature"] = profile["temperature"]
+        generation_config["max_output_tokens"] = profile["max_output_tokens"]
+
+        cache_model = profile.get("cache_model") or CACHE_MODELS.get(profile["model"])
+        if system_instruction and self.use_context_cache and self.backend != "local" and cache_model:
+            try:
+                cached = genai.caching.CachedContent.create(
+                    model=f"models/{cache_model}",
+                    system_instruction=system_instruction,
+                    ttl=CONTEXT_CACHE_TTL
+                )
+                model = genai.GenerativeModel.from_cached_content(
+                    cached, generation_config=generation_config
+                )
+                return model, time.monotonic() + CONTEXT_CACHE_TTL - CONTEXT_CACHE_REFRESH
+            except Exception as e:
+                # The API refuses to cache prefixes below its minimum size
+                logger.info(f"Context cache unavailable, using system instruction: {str(e)}")
+
+        model = self.model_class(
+            profile["model"],
+            generation_config=generation_config,
+            system_instruction=system_instruction
+        )
+        return model, float("inf")
+
+    def model_for(self, profile_name: str = "default", system_instruction: str = None, degraded: bool = False):
+        """Model configured for a call-site profile and static instruction"""
+        key = (profile_name, system_instruction, degraded)
+        entry = self._models.get(key)
+        if entry is None or entry[1] <= time.monotonic():
+            with self._models_lock:
+                entry = self._models.get(key)
+                # Models on a context cache are replaced before the cache expires
+                if entry is None or entry[1] <= time.monotonic():
+                    profile = self.get_profile(profile_name, degraded)
+                    entry = self._models[key] = self._build_model(profile, system_instruction)
+        return entry[0]
+
+    def _meter(self, turn, call_site: str, prompt: str, system_instruction: str, text: str, usage, images: list = None):
+        """Record token usage, estimating locally when the API reports none"""
+        prompt_tokens = getattr(usage, "prompt_token_count", 0)
+        response_tokens = getattr(usage, "candidates_token_count", 0)
+        if not prompt_tokens:
+            prompt_tokens = estimate_tokens(prompt) + estimate_tokens(system_instruction)
+            prompt_tokens += sum(estimate_image_tokens(image["width"], image["height"]) for image in images or [])
+        if not response_tokens:
+            response_tokens = estimate_tokens(text)
+        usage_meter.record(
+            turn.user_id if turn else "system",
+            turn.intent if turn else None,
+            call_site,
+            prompt_tokens,
+            response_tokens
+        )
+
+    def generate_response(self, prompt: str, stream: bool = False, system_instruction: str = None,
+                          profile: str = "default", call_site: str = None, images: list = None) -> str:
+        """Synchronous response generation.
+
+        With stream=True and a token sink on the current turn, chunks are
+        pushed to the sink as they arrive. A cancelled turn stops at the next
+        chunk or call boundary. Raises LLMUnavailable when the model fails,
+        the turn runs out of time, or the backend circuit is open.
+        `images` are prepared uploads from image_pipeline, sent after the text.
+        """
+        turn = current_turn()
+        degraded = bool(turn and turn.degraded)
+        model = self.model_for(profile, system_instruction, degraded)
+        config = self.get_profile(profile)
+        started = time.perf_counter()
         try:
-            response = self.model.generate_content(prompt)
-            return response.text
+            if turn:
+                turn.check_cancelled()
+                timeout = turn.timeout_for(config["timeout"], config["deadline_share"])
+            else:
+                timeout = config["timeout"]
+            llm_breaker.allow()
+        except (DeadlineExceeded, CircuitOpen) as e:
+            raise LLMUnavailable(str(e) or "Turn deadline exceeded") from e
+
+        request_options = {"timeout": timeout}
+        contents = prompt
+        if images:
+            contents = [prompt] + [{"mime_type": image["mime_type"], "data": image["data"]} for image in images]
+        try:
+            if stream and turn and turn.on_token:
+                chunks = []
+                usage = None
+                first_chunk = None
+                for chunk in model.generate_content(contents, stream=True, request_options=request_options):
+                    turn.check_cancelled()
+                    if first_chunk is None:
+                        first_chunk = time.perf_counter() - started
+                    elif turn.remaining() is not None and turn.remaining() <= 0:
+                        raise DeadlineExceeded("Turn deadline exceeded while streaming")
+                    chunks.append(chunk.text)
+                    turn.on_token(chunk.text)
+                    usage = getattr(chunk, "usage_metadata", None) or usage
+                text = "".join(chunks)
+                # A long answer is not a slow backend, time to first token is
+                llm_breaker.record_success(first_chunk or 0.0)
+            else:
+                response = model.generate_content(contents, request_options=request_options)
+                llm_breaker.record_success(time.perf_counter() - started)
+                if turn:
+                    turn.check_cancelled()
+                text = response.text
+                usage = getattr(response, "usage_metadata", None)
+
+            self._meter(turn, call_site or profile, prompt, system_instruction, text, usage, images)
+            return text
+        except GenerationCancelled:
+            llm_breaker.release_probe()
+            raise
+        except DeadlineExceeded as e:
+            # The turn ran out of time while the backend was still answering,
+            # which says nothing about the backend's health
+            llm_breaker.release_probe()
+            raise LLMUnavailable(str(e)) from e
         except Exception as e:
-            return f"Error generating response: {str(e)}"
-    
+            llm_breaker.record_failure()
+            raise LLMUnavailable(f"Error generating response: {str(e)}") from e
+        finally:
+            if turn:
+                turn.llm_calls.append({
+                    "call_site": call_site or profile,
+                    "prompt_bytes": len(prompt.encode("utf-8")),
+                    "image_bytes": sum(len(image["data"]) for image in images or []),
+                    "ms": round((time.perf_counter() - started) * 1000, 1)
+                })
+
+    def generate_prompt(self, template, stream: bool = False, images: list = None, **slots) -> str:
+        """Render a PromptTemplate, sending only its per-turn part with the call"""
+        return self.generate_response(
+            template.render(**slots),
+            stream=stream,
+            system_instruction=template.system,
+            profile=template.profile,
+            call_site=template.name,
+            images=images
+        )
+
     async def generate_response_async(self, prompt: str) -> str:
         """Asynchronous response generation"""
         try:
@@ -44,4 +272,4 @@ class GeminiWrapper:
             )
             return response.text
         except Exception as e:
-            return f"Error generating response: {str(e)}"
+            raise LLMUnavailable(f"Error generating response: {str(e)}") from e
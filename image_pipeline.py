@@ -0,0 +1,107 @@
+import asyncio
+import base64
+import io
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+IMAGE_MAX_SIDE = int(os.getenv("IMAGE_MAX_SIDE", "1024"))
+IMAGE_QUALITY = int(os.getenv("IMAGE_QUALITY", "80"))
+IMAGE_MAX_COUNT = int(os.getenv("IMAGE_MAX_COUNT", "6"))
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "0")) or os.cpu_count() or 1
+
+# Refuse decompression bombs long before they reach the resize step
+Image.MAX_IMAGE_PIXELS = 60_000_000
+
+
+def decode_data_url(data: str) -> bytes:
+    """Raw bytes of a browser data URL ("data:image/png;base64,...") or bare base64"""
+    if data.startswith("data:"):
+        data = data.split(",", 1)[1]
+    return base64.b64decode(data)
+
+
+def preprocess_image(raw: bytes, max_side: int = IMAGE_MAX_SIDE, quality: int = IMAGE_QUALITY) -> dict:
+    """Downscale to `max_side`, apply EXIF rotation, re-encode as baseline JPEG.
+
+    Only pixels are written back, so EXIF, GPS and other metadata are
+    dropped. Runs in a worker process.
+    """
+    image = Image.open(io.BytesIO(raw))
+    # JPEGs can be decoded straight at a reduced scale, far cheaper than a full decode
+    image.draft("RGB", (max_side, max_side))
+    image = ImageOps.exif_transpose(image)
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    image.thumbnail((max_side, max_side), Image.LANCZOS, reducing_gap=2.0)
+
+    out = io.BytesIO()
+    image.save(out, "JPEG", quality=quality)
+    return {
+        "mime_type": "image/jpeg",
+        "data": out.getvalue(),
+        "width": image.width,
+        "height": image.height,
+        "original_bytes": len(raw)
+    }
+
+
+class ImagePipeline:
+    """Process pool that prepares uploaded photos before any model sees them.
+
+    Decoding and resizing are CPU-bound and hold the GIL, so they run in
+    separate processes, never on the event loop or request threads.
+    """
+
+    def __init__(self, workers: int = IMAGE_WORKERS, max_side: int = IMAGE_MAX_SIDE,
+                 quality: int = IMAGE_QUALITY, max_count: int = IMAGE_MAX_COUNT):
+        self.workers = workers
+        self.max_side = max_side
+        self.quality = quality
+        self.max_count = max_count
+        self._executor = None
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # Forking a process that already runs threads can deadlock
+            self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+    async def process(self, images: list) -> list:
+        """Prepared copies of uploaded images; unreadable ones are dropped"""
+        loop = asyncio.get_running_loop()
+        jobs = []
+        for image in images[:self.max_count]:
+            try:
+                raw = decode_data_url(image.get("data") or "")
+            except Exception as e:
+                logger.warning(f"Skipping undecodable upload {image.get('name')}: {str(e)}")
+                continue
+            if raw:
+                jobs.append((image.get("name"), loop.run_in_executor(
+                    self.executor, preprocess_image, raw, self.max_side, self.quality
+                )))
+
+        prepared = []
+        for name, job in jobs:
+            try:
+                result = await job
+            except Exception as e:
+                logger.warning(f"Skipping unreadable image {name}: {str(e)}")
+                continue
+            result["name"] = name
+            prepared.append(result)
+        return prepared
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+
+image_pipeline = ImagePipeline()
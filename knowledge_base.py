@@ -0,0 +1,92 @@
+import json
+import logging
+import os
+import threading
+import time
+from types import MappingProxyType
+from phrase_matcher import PhraseMatcher
+
+logger = logging.getLogger(__name__)
+
+
+def freeze(value):
+    """Read-only copy: dicts become mapping proxies, lists become tuples"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+def thaw(value):
+    """Plain dict/list copy of a frozen value, safe to hand to callers"""
+    if isinstance(value, MappingProxyType):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [thaw(item) for item in value]
+    return value
+
+
+class KnowledgeBase:
+    """Keyword-routed canned answers, built once and swapped whole on reload.
+
+    The data is {"rules": [{"keywords": [...], "answer": {...}}, ...],
+    "default": {...}}, with rules in priority order. It comes from the JSON
+    file at `path` when one exists, else from the built-in `data`. The file's
+    modification time is checked at most every `reload_interval` seconds and
+    a changed file is rebuilt by the lookup that notices it. Other lookups
+    keep reading the previous immutable snapshot and never wait.
+    """
+
+    def __init__(self, name: str, data: dict, path: str = None, reload_interval: float = 5.0):
+        self.name = name
+        self.builtin = data
+        self.path = path
+        self.reload_interval = reload_interval
+        self.loaded_mtime = None
+        self.reloads = 0
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+        self._snapshot = self._build(data)
+        self.maybe_reload(force=True)
+
+    def _build(self, data: dict) -> tuple:
+        rules = data["rules"]
+        matcher = PhraseMatcher([(n, rule["keywords"]) for n, rule in enumerate(rules)])
+        answers = freeze([rule["answer"] for rule in rules])
+        return matcher, answers, freeze(data["default"])
+
+    def maybe_reload(self, force: bool = False):
+        if not self.path or (not force and time.monotonic() < self._next_check):
+            return
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            self._next_check = time.monotonic() + self.reload_interval
+            try:
+                mtime = os.path.getmtime(self.path)
+            except OSError:
+                return
+            if mtime == self.loaded_mtime:
+                return
+            with open(self.path, encoding="utf-8") as f:
+                self._snapshot = self._build(json.load(f))
+            self.loaded_mtime = mtime
+            self.reloads += 1
+        except Exception as e:
+            # A broken edit keeps the previous answers in service
+            self.loaded_mtime = mtime
+            logger.error(f"Error loading {self.name} knowledge base: {e}")
+        finally:
+            self._lock.release()
+
+    def lookup(self, text: str) -> dict:
+        """Answer of the first rule with a keyword in `text`, else the default"""
+        self.maybe_reload()
+        matcher, answers, default = self._snapshot
+        rule = matcher.first(text)
+        return thaw(default if rule is None else answers[rule])
+
+    def stats(self) -> dict:
+        return {"rules": len(self._snapshot[1]), "source": self.path if self.loaded_mtime else "builtin",
+                "reloads": self.reloads}
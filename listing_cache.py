@@ -0,0 +1,73 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+
+def normalize_value(value):
+    """Canonical form of a listing field, so cosmetic edits hash the same"""
+    if isinstance(value, str):
+        return " ".join(value.lower().split())
+    if isinstance(value, dict):
+        return {normalize_value(key): normalize_value(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [normalize_value(item) for item in value]
+    return value
+
+
+def listing_key(user_id: str, listing_data: dict) -> str:
+    canonical = json.dumps(normalize_value(listing_data), sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(f"{user_id}\n{canonical}".encode("utf-8")).hexdigest()
+
+
+class ListingCache:
+    """LRU of generated listings keyed by user and canonical listing data.
+
+    Retries, refreshes and re-confirmations of the same listing return the
+    stored result instead of paying for another generation. Only
+    successful generations are stored.
+    """
+
+    def __init__(self, max_entries: int = 2048):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.regenerations = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            result = self.entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, key: str, result: dict):
+        with self._lock:
+            self.entries[key] = result
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def note_regeneration(self):
+        with self._lock:
+            self.regenerations += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "regenerations": self.regenerations,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+            }
+
+
+listing_cache = ListingCache(max_entries=int(os.getenv("LISTING_CACHE_SIZE", "2048")))
@@ -0,0 +1,27 @@
+from price_index import price_index, record_listing
+from saved_searches import saved_searches
+from search_parser_tool import learn_listing_vocabulary
+from suggest_index import suggest_index
+
+
+def learn_listing(listing_data: dict, generated_listing: dict):
+    """Feed one listing to the price index, the typo corrector and the suggester"""
+    record_listing(listing_data, generated_listing, save=False)
+    learn_listing_vocabulary(listing_data, generated_listing)
+    for title in (generated_listing.get("titles") or [])[:1]:
+        suggest_index.add(title)
+
+
+def ingest_listing(listing_data: dict, generated_listing: dict) -> int:
+    """Take in a newly published listing; returns how many saved searches it matched"""
+    return ingest_listings([(listing_data, generated_listing)])[0]
+
+
+def ingest_listings(listings: list) -> list:
+    """Take in many (listing_data, generated_listing) pairs, saving the indexes
+    once and percolating the whole batch against the saved searches"""
+    for listing_data, generated_listing in listings:
+        learn_listing(listing_data, generated_listing)
+    price_index.save(min_interval=30)
+    suggest_index.save(min_interval=60)
+    return saved_searches.notify_batch(listings)
@@ -0,0 +1,111 @@
+import json
+import os
+import re
+import threading
+import time
+from usage_meter import estimate_tokens
+
+# Shared counters for every LocalModel, read by benchmarks and replay runs
+backend_stats = {
+    "models": 0,
+    "calls": 0,
+    "system_bytes": 0,
+    "request_bytes": 0,
+    "inline_bytes": 0,
+    "response_bytes": 0,
+    "image_bytes": 0
+}
+_stats_lock = threading.Lock()
+
+
+def reset_stats():
+    with _stats_lock:
+        for key in backend_stats:
+            backend_stats[key] = 0
+
+
+class LocalUsage:
+    def __init__(self, prompt_token_count: int, candidates_token_count: int):
+        self.prompt_token_count = prompt_token_count
+        self.candidates_token_count = candidates_token_count
+        self.total_token_count = prompt_token_count + candidates_token_count
+
+
+class LocalResponse:
+    def __init__(self, text: str, usage_metadata: LocalUsage = None):
+        self.text = text
+        self.usage_metadata = usage_metadata
+
+
+class LocalModel:
+    """Stand-in for genai.GenerativeModel that answers locally.
+
+    Replies are canned but shaped like the real ones (one-word intents,
+    JSON listings, markdown answers), and an optional delay simulates model
+    latency. Used for benchmarks and traffic replay, never in production.
+    """
+
+    def __init__(self, model_name: str = "local", generation_config: dict = None,
+                 system_instruction: str = None, **kwargs):
+        self.model_name = model_name
+        self.generation_config = generation_config or {}
+        self.system_instruction = system_instruction or ""
+        self.latency = float(os.getenv("LOCAL_LLM_LATENCY_MS", "0")) / 1000
+        with _stats_lock:
+            backend_stats["models"] += 1
+            backend_stats["system_bytes"] += len(self.system_instruction.encode("utf-8"))
+
+    def _reply(self, prompt: str) -> str:
+        instructions = f"{self.system_instruction}\n{prompt}"
+        if "Respond with just one word" in instructions:
+            message = re.search(r'Current User Message:\*\* "(.*)"', prompt)
+            text = (message.group(1) if message else prompt).lower()
+            if re.search(r"\b(sell|selling)\b", text):
+                return "SELL"
+            if re.search(r"\b(buy|find|looking for)\b", text):
+                return "BUY"
+            if re.search(r"\b(safe|scam|policy)\b", text):
+                return "SAFETY"
+            if re.search(r"\b(how do i|app|account)\b", text):
+                return "APP_HELP"
+            return "GENERAL"
+        if "Format as JSON" in instructions:
+            return json.dumps({
+                "titles": ["Local listing title"],
+                "description": "Generated by the local backend",
+                "category": "Electronics",
+                "price_range": {"min": 9000, "max": 11000, "suggested": 10000, "currency": "INR"},
+                "tags": ["local"],
+                "tips": ["Add clear photos"]
+            })
+        return "Here is a local answer. Could you tell me a bit more about what you need?"
+
+    def generate_content(self, contents, stream: bool = False, **kwargs):
+        parts = [contents] if isinstance(contents, str) else list(contents)
+        prompt = "\n".join(part for part in parts if isinstance(part, str))
+        image_bytes = sum(len(part["data"]) for part in parts if isinstance(part, dict))
+        text = self._reply(prompt)
+        if self.latency:
+            # Behave like the API client: give up once the request timeout passes
+            timeout = (kwargs.get("request_options") or {}).get("timeout")
+            if timeout is not None and self.latency > timeout:
+                time.sleep(timeout)
+                raise TimeoutError(f"Local model took longer than {timeout:.2f}s")
+            time.sleep(self.latency)
+
+        with _stats_lock:
+            backend_stats["calls"] += 1
+            backend_stats["request_bytes"] += len(prompt.encode("utf-8"))
+            # What the call would have cost with the system part inlined
+            backend_stats["inline_bytes"] += len(f"{self.system_instruction}\n\n{prompt}".encode("utf-8"))
+            backend_stats["response_bytes"] += len(text.encode("utf-8"))
+            backend_stats["image_bytes"] += image_bytes
+
+        usage = LocalUsage(estimate_tokens(self.system_instruction) + estimate_tokens(prompt), estimate_tokens(text))
+        if stream:
+            words = text.split(" ")
+            return iter([
+                LocalResponse(word + (" " if i < len(words) - 1 else ""), usage if i == len(words) - 1 else None)
+                for i, word in enumerate(words)
+            ])
+        return LocalResponse(text, usage)
@@ -1,9 +1,32 @@
-from fastapi import FastAPI, Request, HTTPException
+from fastapi import FastAPI, Request, Response, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
+from starlette.concurrency import run_in_threadpool
 from marketplace_ai import MarketplaceAI
+from admission_control import RejectedRequest, session_locks, rate_limiter, admission_controller
+from turn_context import TURN_DEADLINE_SECONDS, GenerationCancelled, TurnContext
+from circuit_breaker import llm_breaker
+from fallbacks import answer_cache
+from usage_meter import usage_meter
+from traffic_recorder import traffic_recorder
+from listing_cache import listing_cache
+from image_pipeline import image_pipeline
+from suggest_index import suggest_index
+from saved_searches import saved_searches
+from listing_ingest import ingest_listing, ingest_listings
+from safety_policy_tool import safety_knowledge
+from app_support_tool import app_help_knowledge
+from search_parser_tool import query_speller
+from session_history import COMPACT_IDLE_SECONDS, compact_idle_sessions
+from sampling_profiler import SamplingProfiler, ProfilingSession
 from pydantic import BaseModel
+import asyncio
+import hmac
+import json
 import os
+import re
+import time
+import uuid
 from dotenv import load_dotenv
 import logging
 from typing import List, Optional
@@ -35,6 +58,32 @@ app.add_middleware(
 )
 
 
+# Profiling: the admin endpoint needs ADMIN_TOKEN, ?profile=1 is for staging only
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+REQUEST_PROFILING = os.getenv("ENABLE_REQUEST_PROFILING", "0") == "1"
+active_profile = None
+
+@app.middleware("http")
+async def profiling_middleware(request: Request, call_next):
+    """Serve ?profile=1 requests and count requests for admin profiling windows"""
+    if REQUEST_PROFILING and request.query_params.get("profile") == "1":
+        profiler = SamplingProfiler(interval=0.001)
+        profiler.start()
+        try:
+            response = await call_next(request)
+        finally:
+            folded = profiler.stop()
+        return PlainTextResponse(folded, headers={
+            "X-Profiled-Status": str(response.status_code),
+            "X-Profile-Samples": str(profiler.sample_count)
+        })
+    
+    response = await call_next(request)
+    if active_profile and request.url.path != "/admin/profile":
+        active_profile.request_finished()
+    return response
+
+
 # Initialize AI
 try:
     marketplace_ai = MarketplaceAI()
@@ -46,9 +95,22 @@ except Exception as e:
 # Request/Response Models
 class ChatRequest(BaseModel):
     message: str
-    user_id: Optional[str] = "default"
+    user_id: Optional[str] = None
     images: Optional[List[dict]] = []
 
+class SavedSearchRequest(BaseModel):
+    query: str
+    user_id: Optional[str] = None
+
+class ListingRequest(BaseModel):
+    # What the seller gave (item_type, brand, model, condition, location) and
+    # the published listing (titles, description, category, price_range, tags)
+    listing_data: dict
+    generated_listing: dict
+
+class ListingBatchRequest(BaseModel):
+    listings: List[ListingRequest]
+
 class ChatResponse(BaseModel):
     success: bool
     response: str
@@ -60,9 +122,47 @@ class HealthResponse(BaseModel):
     ai_initialized: bool
     version: str
 
+# Ids that name nobody; such callers must not share one session, lock and rate bucket
+ANONYMOUS_IDS = {"", "default"}
+# Anonymous HTTP callers are told apart by a random id in this cookie, not by
+# their address, which a proxy or NAT shares between unrelated users
+ANON_COOKIE = "anon_id"
+ANON_COOKIE_MAX_AGE = 30 * 86400
+ANON_ID = re.compile(r"[0-9a-f]{32}")
+
+def anonymous_cookie_id(request) -> Optional[str]:
+    anon_id = request.cookies.get(ANON_COOKIE, "")
+    return anon_id if ANON_ID.fullmatch(anon_id) else None
+
+def resolve_user_id(user_id: Optional[str], request: Request, response: Response) -> str:
+    """The caller's user id, or the anonymous id from its cookie, issuing one if needed"""
+    user_id = (user_id or "").strip()
+    if user_id not in ANONYMOUS_IDS:
+        return user_id
+    anon_id = anonymous_cookie_id(request)
+    if anon_id is None:
+        anon_id = uuid.uuid4().hex
+        response.set_cookie(ANON_COOKIE, anon_id, max_age=ANON_COOKIE_MAX_AGE, httponly=True, samesite="lax")
+    return f"anon:{anon_id}"
+
+def require_user_id(user_id: Optional[str]) -> str:
+    """Saved searches and notifications outlive a connection, so they need a real id"""
+    user_id = (user_id or "").strip()
+    if user_id in ANONYMOUS_IDS:
+        raise HTTPException(status_code=400, detail="user_id is required")
+    return user_id
+
+async def build_context(images: Optional[List[dict]]) -> dict:
+    """Create context for images if provided, downscaled and stripped of metadata"""
+    context = {}
+    if images:
+        context['images'] = await image_pipeline.process(images)
+        context['has_images'] = bool(context['images'])
+    return context
+
 # API Endpoints
 @app.post("/api/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest):
+async def chat(request: ChatRequest, http_request: Request, http_response: Response):
     """Main chat endpoint - send message, get AI response"""
     
     if not marketplace_ai:
@@ -77,19 +177,38 @@ async def chat(request: ChatRequest):
             detail="Message cannot be empty"
         )
     
+    user_id = resolve_user_id(request.user_id, http_request, http_response)
     try:
-        # Create context for images if provided
-        context = {}
-        if request.images:
-            context['images'] = request.images
-            context['has_images'] = True
-        
-        # Get AI response
-        response = marketplace_ai.run(
-            request.message, 
-            request.user_id, 
-            context
+        rate_limiter.check(user_id)
+    except RejectedRequest as e:
+        raise HTTPException(
+            status_code=429,
+            detail=e.reason,
+            headers={"Retry-After": str(e.retry_after)}
         )
+    
+    started_at = time.time()
+    started = time.perf_counter()
+    timings = {}
+    turn = TurnContext(user_id, budget=TURN_DEADLINE_SECONDS)
+    status = "ok"
+    
+    try:
+        context = await build_context(request.images)
+        prepared = time.perf_counter()
+        timings["images"] = prepared - started
+        
+        # One turn per user at a time, and only while there is LLM capacity
+        async with session_locks.hold(user_id):
+            async with admission_controller.slot():
+                timings["queue"] = time.perf_counter() - prepared
+                response = await run_in_threadpool(
+                    marketplace_ai.run,
+                    request.message, 
+                    user_id, 
+                    context,
+                    turn
+                )
         
         return ChatResponse(
             success=True,
@@ -97,13 +216,139 @@ async def chat(request: ChatRequest):
             needs_images=getattr(response, 'needs_images', False)
         )
         
+    except RejectedRequest as e:
+        status = "shed"
+        raise HTTPException(
+            status_code=429,
+            detail=e.reason,
+            headers={"Retry-After": str(e.retry_after)}
+        )
     except Exception as e:
+        status = "error"
         logger.error(f"Error in chat: {str(e)}")
         return ChatResponse(
             success=False,
             response="",
             error=str(e)
         )
+    finally:
+        if traffic_recorder.enabled:
+            timings["total"] = time.perf_counter() - started
+            traffic_recorder.record(
+                started_at, user_id, request.message,
+                len(request.images or []), turn, timings, status
+            )
+
+@app.websocket("/ws/chat")
+async def chat_socket(websocket: WebSocket):
+    """Streaming chat channel bound to one session.
+    
+    Client sends {"id", "message", "images"}; server pushes "token",
+    "needs_images", "done" and "error" events tagged with the same id.
+    A newer message or a closed socket cancels the turn in flight.
+    """
+    await websocket.accept()
+    user_id = websocket.query_params.get("user_id", "").strip()
+    # An anonymous socket without the cookie is its own session, dropped on disconnect
+    connection_session = False
+    if user_id in ANONYMOUS_IDS:
+        anon_id = anonymous_cookie_id(websocket)
+        connection_session = anon_id is None
+        user_id = f"anon:{anon_id or uuid.uuid4().hex}"
+    loop = asyncio.get_running_loop()
+    outbox = asyncio.Queue()
+    current_turn = None
+    
+    async def sender():
+        while True:
+            event = await outbox.get()
+            await websocket.send_json(event)
+    
+    def push(event):
+        # Called from worker threads as well as the event loop
+        loop.call_soon_threadsafe(outbox.put_nowait, event)
+    
+    async def run_turn(turn_id, message, images, turn):
+        try:
+            context = await build_context(images)
+            # The turn is never task-cancelled: it keeps the session lock until
+            # its worker thread has actually stopped, so turns can't overlap
+            async with session_locks.hold(user_id):
+                turn.check_cancelled()
+                async with admission_controller.slot():
+                    response = await run_in_threadpool(
+                        marketplace_ai.run, message, user_id, context, turn
+                    )
+            if response.needs_images:
+                push({"type": "needs_images", "id": turn_id})
+            push({
+                "type": "done",
+                "id": turn_id,
+                "response": response.content,
+                "needs_images": response.needs_images
+            })
+        except GenerationCancelled:
+            push({"type": "cancelled", "id": turn_id})
+        except RejectedRequest as e:
+            push({"type": "error", "id": turn_id, "error": e.reason, "retry_after": e.retry_after})
+        except Exception as e:
+            logger.error(f"Error in chat socket: {str(e)}")
+            push({"type": "error", "id": turn_id, "error": str(e)})
+    
+    sender_task = asyncio.create_task(sender())
+    # Held so running turns aren't garbage-collected, and can be stopped on disconnect
+    turn_tasks = set()
+    try:
+        while True:
+            try:
+                data = json.loads(await websocket.receive_text())
+            except ValueError:
+                data = None
+            if not isinstance(data, dict):
+                push({"type": "error", "id": None, "error": "Messages must be JSON objects"})
+                continue
+            turn_id = data.get("id")
+            message = (data.get("message") or "").strip()
+            
+            if not marketplace_ai or not message:
+                error = "AI system not initialized" if not marketplace_ai else "Message cannot be empty"
+                push({"type": "error", "id": turn_id, "error": error})
+                continue
+            
+            try:
+                rate_limiter.check(user_id)
+            except RejectedRequest as e:
+                push({"type": "error", "id": turn_id, "error": e.reason, "retry_after": e.retry_after})
+                continue
+            
+            # Nobody will read the previous answer any more
+            if current_turn:
+                current_turn.cancel()
+            
+            current_turn = TurnContext(
+                user_id,
+                on_token=lambda text, turn_id=turn_id: push({"type": "token", "id": turn_id, "text": text}),
+                budget=TURN_DEADLINE_SECONDS
+            )
+            task = asyncio.create_task(
+                run_turn(turn_id, message, data.get("images"), current_turn)
+            )
+            turn_tasks.add(task)
+            task.add_done_callback(turn_tasks.discard)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        if current_turn:
+            current_turn.cancel()
+        # A cancelled turn stops at its next call boundary; waiting for that keeps
+        # its worker thread from running on after the session lock is released
+        if turn_tasks:
+            _, pending = await asyncio.wait(turn_tasks, timeout=TURN_DEADLINE_SECONDS)
+            for task in pending:
+                task.cancel()
+        sender_task.cancel()
+        if connection_session and marketplace_ai:
+            marketplace_ai.clear_history(user_id)
 
 @app.get("/api/health", response_model=HealthResponse)
 async def health_check():
@@ -114,11 +359,130 @@ async def health_check():
         version="1.0.0"
     )
 
+@app.get("/api/stats")
+async def stats():
+    """Load and admission statistics"""
+    return {
+        "admission": admission_controller.stats(),
+        "active_sessions": session_locks.active_sessions(),
+        "usage": usage_meter.stats(),
+        "listing_cache": listing_cache.stats(),
+        "llm_breaker": llm_breaker.stats(),
+        "fallback_answers": answer_cache.stats(),
+        "saved_searches": saved_searches.stats(),
+        "knowledge_bases": {"safety": safety_knowledge.stats(), "app_help": app_help_knowledge.stats()}
+    }
+
+async def compact_sessions_periodically():
+    while True:
+        await asyncio.sleep(max(COMPACT_IDLE_SECONDS / 4, 5))
+        if marketplace_ai:
+            await run_in_threadpool(compact_idle_sessions, marketplace_ai.user_sessions)
+
+@app.on_event("startup")
+async def start_session_compaction():
+    asyncio.get_running_loop().create_task(compact_sessions_periodically())
+
+@app.on_event("shutdown")
+def flush_usage():
+    usage_meter.flush()
+    suggest_index.save()
+    image_pipeline.shutdown()
+
+@app.get("/api/suggest")
+async def suggest(q: str = "", limit: int = 8):
+    """Ranked completions for a partially typed search"""
+    suggestions = suggest_index.suggest(q, limit)
+    if not suggestions and len(q.strip()) >= 4:
+        # "iphon" has no completions, "iphone" does
+        suggestions = suggest_index.suggest(query_speller.correct(q), limit)
+    return {"query": q, "suggestions": suggestions}
+
+def require_admin(request: Request):
+    token = request.headers.get("x-admin-token", "")
+    if not ADMIN_TOKEN or not hmac.compare_digest(token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+@app.post("/admin/profile")
+async def admin_profile(request: Request, seconds: float = 10, requests: int = 0, interval_ms: float = 10):
+    """Sample all worker threads for `seconds`, or until `requests` requests finish.
+    
+    Returns folded stacks, ready for flamegraph.pl or speedscope.
+    """
+    global active_profile
+    
+    require_admin(request)
+    if active_profile:
+        raise HTTPException(status_code=409, detail="A profiling session is already running")
+    
+    # `seconds` is the window, or the timeout when waiting for `requests`
+    seconds = min(max(seconds, 0.1), 300)
+    session = ProfilingSession(requests or None, max(interval_ms, 1) / 1000)
+    active_profile = session
+    session.profiler.start()
+    try:
+        if requests:
+            try:
+                await asyncio.wait_for(session.done.wait(), timeout=seconds)
+            except asyncio.TimeoutError:
+                pass
+        else:
+            await asyncio.sleep(seconds)
+    finally:
+        folded = session.profiler.stop()
+        active_profile = None
+    
+    return PlainTextResponse(folded, headers={
+        "X-Profile-Samples": str(session.profiler.sample_count),
+        "X-Profile-Requests": str(session.requests_seen)
+    })
+
+@app.post("/api/saved-searches")
+async def save_search(request: SavedSearchRequest):
+    """Save a search; the user is notified when a matching listing appears"""
+    if not request.query.strip():
+        raise HTTPException(status_code=400, detail="Query cannot be empty")
+    return saved_searches.save_search(require_user_id(request.user_id), request.query.strip())
+
+@app.get("/api/saved-searches")
+async def list_saved_searches(user_id: str = ""):
+    return {"searches": saved_searches.list_searches(require_user_id(user_id))}
+
+@app.delete("/api/saved-searches/{search_id}")
+async def delete_saved_search(search_id: int, user_id: str = ""):
+    if not saved_searches.remove_search(require_user_id(user_id), search_id):
+        raise HTTPException(status_code=404, detail="Saved search not found")
+    return {"success": True}
+
+@app.get("/api/notifications")
+async def notifications(user_id: str = ""):
+    """New listings matching the user's saved searches since the last fetch"""
+    return {"notifications": saved_searches.pop_notifications(require_user_id(user_id))}
+
+@app.post("/api/listings")
+async def add_listing(listing: ListingRequest, request: Request):
+    """Take in a published listing from the marketplace backend: its price,
+    names and title feed search, and matching saved searches are notified"""
+    require_admin(request)
+    notified = await run_in_threadpool(ingest_listing, listing.listing_data, listing.generated_listing)
+    return {"notified": notified}
+
+@app.post("/api/listings/batch")
+async def add_listings(batch: ListingBatchRequest, request: Request):
+    """Bulk /api/listings, percolated against the saved searches in one pass"""
+    require_admin(request)
+    pairs = [(listing.listing_data, listing.generated_listing) for listing in batch.listings]
+    notified = await run_in_threadpool(ingest_listings, pairs)
+    return {"notified": notified}
+
 @app.post("/api/clear")
-async def clear_conversation(request: Request):
+async def clear_conversation(request: Request, response: Response):
     """Clear conversation history for a user"""
-    data = await request.json()
-    user_id = data.get("user_id", "default")
+    try:
+        data = await request.json()
+    except ValueError:
+        data = {}
+    user_id = resolve_user_id(data.get("user_id"), request, response)
     
     if marketplace_ai:
         marketplace_ai.clear_history(user_id)
@@ -134,7 +498,13 @@ async def root():
         "status": "running",
         "endpoints": {
             "chat": "/api/chat",
+            "chat_socket": "/ws/chat",
             "health": "/api/health", 
+            "stats": "/api/stats",
+            "suggest": "/api/suggest",
+            "saved_searches": "/api/saved-searches",
+            "notifications": "/api/notifications",
+            "listings": "/api/listings",
             "clear": "/api/clear",
             "docs": "/docs"
         }
@@ -0,0 +1,282 @@
+import math
+import re
+import sys
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from search_parser_tool import CONDITION_WORDS, LOCATION_KEYWORDS, STOP_WORDS
+
+# Searches that name one of these match listings anywhere
+ANY_LOCATION = {None, "near me", "nearby", "local"}
+# A "used" search accepts any condition short of new
+USED_CONDITIONS = {"used", "excellent", "good", "fair", "poor"}
+# Price bands grow by 25%, so a band's bounds are within 25% of any price in it
+BAND_BASE = math.log(1.25)
+UNBOUNDED = float("inf")
+# Query words that state where or in what state, already held by the location
+# and condition fields, and would otherwise have to appear in the listing text
+NON_KEYWORDS = (STOP_WORDS | set(CONDITION_WORDS) | {"condition", "near", "around", "nearby", "local"}
+                | {word for place in LOCATION_KEYWORDS for word in place.split()})
+
+
+def normalize_term(word: str) -> str:
+    word = word.lower()
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        word = word[:-1]
+    return sys.intern(word)
+
+
+def listing_terms(text: str) -> set:
+    return {normalize_term(word) for word in re.findall(r"[a-z0-9]+", text.lower())}
+
+
+def price_band(price: float) -> int:
+    return int(math.log(max(price, 1.0)) / BAND_BASE)
+
+
+class PriceBuckets:
+    """Saved searches of one anchor bucket, arranged for price stabbing queries.
+
+    Searches without an upper bound sit in their own list; the rest are
+    grouped into log-scale bands by their maximum price and kept sorted by
+    minimum price within a band. Every band above a listing's price band
+    can only hold searches whose maximum is high enough, and a bisect on
+    the minimums cuts off those whose minimum is too high, so the work is
+    proportional to the matches plus one partial band.
+    """
+
+    __slots__ = ("bands", "band_keys", "open_mins", "open_ids")
+
+    def __init__(self):
+        self.bands = {}
+        self.band_keys = []
+        self.open_mins = array("d")
+        self.open_ids = array("q")
+
+    def _insert(self, mins: array, ids: array, price_min: float, search_id: int):
+        position = bisect_right(mins, price_min)
+        mins.insert(position, price_min)
+        ids.insert(position, search_id)
+
+    def add(self, search_id: int, price_min: float, price_max: float):
+        if price_max == UNBOUNDED:
+            self._insert(self.open_mins, self.open_ids, price_min, search_id)
+            return
+        band = price_band(price_max)
+        entry = self.bands.get(band)
+        if entry is None:
+            entry = self.bands[band] = (array("d"), array("q"), array("d"))
+            insort(self.band_keys, band)
+        mins, ids, maxes = entry
+        position = bisect_right(mins, price_min)
+        mins.insert(position, price_min)
+        ids.insert(position, search_id)
+        maxes.insert(position, price_max)
+
+    def extend(self, rows: list):
+        """Bulk add of (search_id, price_min, price_max) rows, sorting each band once"""
+        pending = {}
+        for search_id, price_min, price_max in rows:
+            band = None if price_max == UNBOUNDED else price_band(price_max)
+            pending.setdefault(band, []).append((price_min, search_id, price_max))
+
+        for band, new_rows in pending.items():
+            if band is None:
+                merged = sorted(list(zip(self.open_mins, self.open_ids)) + [(m, i) for m, i, _ in new_rows])
+                self.open_mins = array("d", (m for m, _ in merged))
+                self.open_ids = array("q", (i for _, i in merged))
+                continue
+            mins, ids, maxes = self.bands.get(band) or (array("d"), array("q"), array("d"))
+            if band not in self.bands:
+                insort(self.band_keys, band)
+            merged = sorted(list(zip(mins, ids, maxes)) + new_rows)
+            self.bands[band] = (
+                array("d", (row[0] for row in merged)),
+                array("q", (row[1] for row in merged)),
+                array("d", (row[2] for row in merged))
+            )
+
+    def _delete(self, mins: array, ids: array, price_min: float, search_id: int, maxes: array = None) -> bool:
+        position = bisect_left(mins, price_min)
+        while position < len(mins) and mins[position] == price_min:
+            if ids[position] == search_id:
+                del mins[position], ids[position]
+                if maxes is not None:
+                    del maxes[position]
+                return True
+            position += 1
+        return False
+
+    def remove(self, search_id: int, price_min: float, price_max: float) -> bool:
+        if price_max == UNBOUNDED:
+            return self._delete(self.open_mins, self.open_ids, price_min, search_id)
+        band = price_band(price_max)
+        entry = self.bands.get(band)
+        if entry is None or not self._delete(entry[0], entry[1], price_min, search_id, entry[2]):
+            return False
+        if not entry[1]:
+            del self.bands[band]
+            self.band_keys.remove(band)
+        return True
+
+    def stab(self, price: float):
+        """Ids of searches whose [min, max] contains `price`"""
+        yield from self.open_ids[:bisect_right(self.open_mins, price)]
+        if price == UNBOUNDED:
+            return
+        start = bisect_left(self.band_keys, price_band(price))
+        for n, band in enumerate(self.band_keys[start:]):
+            mins, ids, maxes = self.bands[band]
+            end = bisect_right(mins, price)
+            if n == 0:
+                # The listing's own band also holds maximums just below its price
+                for i in range(end):
+                    if maxes[i] >= price:
+                        yield ids[i]
+            else:
+                yield from ids[:end]
+
+    def __len__(self) -> int:
+        return len(self.open_ids) + sum(len(entry[1]) for entry in self.bands.values())
+
+
+class Percolator:
+    """Reverse index that finds the saved searches a new listing satisfies.
+
+    Each search is filed under one anchor: its rarest keyword, else its
+    category, else a catch-all bucket. A listing probes only the anchors it
+    could satisfy (its own words, its category and the catch-all), stabs
+    each bucket's price structure with its price, and checks the few
+    survivors against the full search. The work follows the number of
+    plausible searches, not the total.
+    """
+
+    def __init__(self):
+        self.searches = {}
+        self.buckets = {}
+        self.postings = {}
+        self.anchors = {}
+        self.next_id = 1
+
+    def _record(self, parsed: dict):
+        # Keywords are matched as the listing spells them, so typos are corrected first
+        corrections = parsed.get("corrections") or {}
+        keywords = tuple(sorted({
+            normalize_term(corrections.get(word, word)) for word in parsed.get("keywords") or []
+            if word not in NON_KEYWORDS
+        }))
+        condition = parsed.get("condition") or "any"
+        location = parsed.get("location")
+        return (
+            parsed.get("category"),
+            None if condition == "any" else sys.intern(condition),
+            None if location in ANY_LOCATION else sys.intern(location),
+            float(parsed.get("price_min") or 0.0),
+            float(parsed.get("price_max") or UNBOUNDED),
+            keywords
+        )
+
+    def _anchor(self, record) -> tuple:
+        category, _, _, _, _, keywords = record
+        if keywords:
+            anchor = "kw", min(keywords, key=lambda word: self.postings.get(word, 0))
+        elif category:
+            anchor = "cat", category
+        else:
+            anchor = "any", None
+        # One shared tuple per anchor, as every search keeps a reference to its own
+        return self.anchors.setdefault(anchor, anchor)
+
+    def _prepare(self, parsed: dict):
+        record = self._record(parsed)
+        anchor = self._anchor(record)
+        if anchor[0] == "kw":
+            self.postings[anchor[1]] = self.postings.get(anchor[1], 0) + 1
+        search_id = self.next_id
+        self.next_id += 1
+        self.searches[search_id] = record + (anchor,)
+        return search_id, anchor, record
+
+    def add(self, parsed: dict) -> int:
+        """Index one saved search (search_parser_tool output); returns its id.
+
+        Ids are handed out in order, so replaying the same adds gives the
+        same ids.
+        """
+        search_id, anchor, record = self._prepare(parsed)
+        self.buckets.setdefault(anchor, PriceBuckets()).add(search_id, record[3], record[4])
+        return search_id
+
+    def add_batch(self, parsed_searches: list) -> list:
+        """Index many searches at once, sorting each price band a single time"""
+        rows = {}
+        ids = []
+        for parsed in parsed_searches:
+            search_id, anchor, record = self._prepare(parsed)
+            rows.setdefault(anchor, []).append((search_id, record[3], record[4]))
+            ids.append(search_id)
+        for anchor, bucket_rows in rows.items():
+            self.buckets.setdefault(anchor, PriceBuckets()).extend(bucket_rows)
+        return ids
+
+    def remove(self, search_id: int) -> bool:
+        """Forget a search, taking it out of its bucket and its anchor's count"""
+        record = self.searches.pop(search_id, None)
+        if record is None:
+            return False
+        anchor = record[6]
+        bucket = self.buckets.get(anchor)
+        if bucket is not None:
+            bucket.remove(search_id, record[3], record[4])
+            if not len(bucket):
+                del self.buckets[anchor]
+        if anchor[0] == "kw":
+            count = self.postings[anchor[1]] - 1
+            if count:
+                self.postings[anchor[1]] = count
+            else:
+                del self.postings[anchor[1]]
+        return True
+
+    def _matches(self, record, category, condition, location, terms) -> bool:
+        search_category, search_condition, search_location, _, _, keywords, _ = record
+        if search_category and search_category != category:
+            return False
+        if search_condition and search_condition != condition:
+            if not (search_condition == "used" and condition in USED_CONDITIONS):
+                return False
+        if search_location and search_location != location:
+            return False
+        return all(word in terms for word in keywords)
+
+    def match(self, listing: dict) -> list:
+        """Ids of saved searches the listing satisfies.
+
+        `listing` has "category", "price", "condition", "location" and
+        "text" (title, description and tags).
+        """
+        category = listing.get("category")
+        condition = (listing.get("condition") or "").lower() or None
+        location = (listing.get("location") or "").lower() or None
+        # "books in pune" names the category and city, not words of the title
+        terms = listing_terms(" ".join(filter(None, (listing.get("text"), category, location))))
+        price = listing.get("price")
+        price = UNBOUNDED if price is None else float(price)
+
+        probes = [("kw", term) for term in terms if term in self.postings]
+        probes += [("cat", category), ("any", None)]
+        matched = []
+        for anchor in probes:
+            bucket = self.buckets.get(anchor)
+            if bucket is None:
+                continue
+            for search_id in bucket.stab(price):
+                record = self.searches.get(search_id)
+                if record and self._matches(record, category, condition, location, terms):
+                    matched.append(search_id)
+        return matched
+
+    def match_batch(self, listings: list) -> list:
+        return [self.match(listing) for listing in listings]
+
+    def __len__(self) -> int:
+        return len(self.searches)
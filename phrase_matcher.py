@@ -0,0 +1,70 @@
+import re
+
+WORD = re.compile(r"\w+")
+
+
+class PhraseMatcher:
+    """Ordered keyword rules matched on whole words in one pass over the text.
+
+    `rules` is a list of (label, phrases); earlier rules win when several
+    match. A phrase matches whole words only, so "pay" does not fire on
+    "paypal" and "list" does not fire on "listing", but a plural "s"/"es"
+    is accepted. A phrase ending in "*" matches any word starting with it
+    ("delet*" catches "delete" and "deleting"), and a phrase with no word
+    characters, like an emoji, matches anywhere.
+
+    The text is split into words once. Single-word phrases are then found by
+    set intersection, phrases of several words are only checked when their
+    first word is present, and all "*" stems share one compiled regex, so
+    the cost barely grows with the number of phrases.
+    """
+
+    def __init__(self, rules: list):
+        self.words = {}
+        self.multi = {}
+        self.stems = {}
+        self.symbols = []
+        for rank, (label, phrases) in enumerate(rules):
+            key = (rank, label)
+            for phrase in phrases:
+                phrase = " ".join(phrase.lower().split())
+                if phrase.endswith("*"):
+                    self.stems.setdefault(phrase[:-1], key)
+                elif not WORD.search(phrase):
+                    self.symbols.append((phrase, key))
+                elif " " in phrase:
+                    pattern = re.compile(
+                        r"(?<!\w)" + r"\s+".join(map(re.escape, phrase.split())) + r"(?:s|es)?(?!\w)"
+                    )
+                    self.multi.setdefault(phrase.split()[0], []).append((pattern, key))
+                else:
+                    self.words.setdefault(phrase, key)
+        self.stem_pattern = None
+        if self.stems:
+            stems = sorted(map(re.escape, self.stems), key=len, reverse=True)
+            self.stem_pattern = re.compile(r"(?<!\w)(" + "|".join(stems) + ")")
+
+    def _found(self, text: str) -> set:
+        text = text.lower()
+        tokens = set(WORD.findall(text))
+        tokens |= {token[:-1] for token in tokens if token[-1] == "s"}
+        tokens |= {token[:-2] for token in tokens if token[-2:] == "es"}
+        found = {self.words[token] for token in tokens & self.words.keys()}
+        for first in tokens & self.multi.keys():
+            found.update(key for pattern, key in self.multi[first] if pattern.search(text))
+        if self.stem_pattern:
+            found.update(self.stems[stem] for stem in self.stem_pattern.findall(text))
+        found.update(key for symbol, key in self.symbols if symbol in text)
+        return found
+
+    def search(self, text: str) -> bool:
+        return bool(self._found(text))
+
+    def labels(self, text: str) -> list:
+        """Every label with a phrase in `text`, in rule order"""
+        return [label for _, label in sorted(self._found(text))]
+
+    def first(self, text: str):
+        """Label of the earliest rule with a phrase in `text`, or None"""
+        found = self._found(text)
+        return min(found)[1] if found else None
@@ -0,0 +1,211 @@
+import re
+from functools import lru_cache
+from safety_policy_tool import ALLOWED_ITEMS
+from search_parser_tool import query_speller
+
+# Terms that identify each disallowed item category, synonyms included.
+# Keys must match DISALLOWED_ITEMS entries.
+POLICY_LEXICON = {
+    "Weapons and ammunition": [
+        "gun", "pistol", "revolver", "rifle", "shotgun", "firearm", "handgun",
+        "ammunition", "ammo", "grenade", "taser", "stun gun", "brass knuckles",
+        "knuckle duster", "country made pistol", "katta"
+    ],
+    "Illegal drugs and substances": [
+        "cocaine", "heroin", "marijuana", "cannabis", "ganja", "charas", "weed",
+        "mdma", "ecstasy pills", "lsd", "meth", "methamphetamine", "opium",
+        "brown sugar drug", "magic mushrooms"
+    ],
+    "Counterfeit or replica items": [
+        "replica", "counterfeit", "first copy", "1st copy", "master copy",
+        "mirror copy", "7a quality", "aaa quality", "knockoff", "fake branded",
+        "duplicate branded"
+    ],
+    "Adult content and services": [
+        "porn", "pornography", "escort service", "escort services", "sex toy", "xxx"
+    ],
+    "Live animals": [
+        "puppies", "parakeet",
+        "cockatiel", "budgie", "hamster", "guinea pig", "live animal",
+        "live bird", "live fish", "pet dog for sale", "pet cat for sale"
+    ],
+    "Prescription medicines": [
+        "prescription medicine", "prescription drug", "tramadol",
+        "codeine", "alprazolam", "xanax", "oxycodone", "morphine", "antibiotics"
+    ],
+    "Stolen or suspicious goods": [
+        "chori ka", "without owner", "stolen goods", "stolen phone", "stolen mobile",
+        "stolen bike", "stolen car", "stolen laptop", "stolen item", "stolen items"
+    ],
+    "Hazardous materials": [
+        "explosive", "explosives", "fireworks", "firecrackers", "crackers box",
+        "lpg cylinder", "gas cylinder", "kerosene"
+    ],
+    "Tobacco products": [
+        "cigarette", "cigarettes", "cigar", "cigars", "tobacco", "gutka",
+        "beedi", "bidi", "vape", "vapes", "e cigarette", "chewing tobacco"
+    ],
+    "Alcoholic beverages": [
+        "alcohol", "liquor", "whisky", "whiskey", "vodka", "brandy", "tequila",
+        "daru", "sealed bottle of"
+    ],
+    "Items violating intellectual property": [
+        "pirated", "piracy", "cracked software", "pirated games", "torrent link",
+        "torrent links", "torrent download", "torrent file", "torrent files"
+    ]
+}
+
+# Everyday words, and product names that reuse them, that only mean a
+# prohibited item in a sale phrase: "litres of petrol", "puppy for sale",
+# but not "Ford Escort 1998" or "kitten heels"
+CONTEXT_TERMS = {
+    "Hazardous materials": ["petrol", "diesel"],
+    "Alcoholic beverages": ["beer", "wine", "gin", "rum"],
+    "Live animals": ["puppy", "kitten", "parrot"],
+    "Prescription medicines": ["prescription", "medicine"],
+    "Adult content and services": ["escort"]
+}
+QUANTITY_WORDS = {
+    "litre", "litres", "liter", "liters", "ltr", "ltrs", "l", "ml", "bottle", "bottles",
+    "crate", "crates", "can", "cans", "carton", "cartons", "case", "cases", "peg", "pegs",
+    "jerrycan", "drum", "drums", "sealed", "strip", "strips"
+}
+SALE_SUFFIXES = [("for", "sale"), ("available",), ("for", "adoption")]
+
+# A hit right after one of these is denied, not offered: "not stolen", "no alcohol"
+NEGATIONS = {"not", "no", "never", "non", "isn", "wasn", "nor"}
+
+# Innocent phrases that contain a lexicon term
+ALLOWED_PHRASES = [
+    "toy gun", "water gun", "nerf gun", "glue gun", "nail gun", "heat gun",
+    "spray gun", "massage gun", "gun metal", "gunmetal", "paint gun",
+    "weed trimmer", "weed killer", "weed eater", "wine glass", "wine glasses",
+    "wine rack", "wine colour", "wine color", "wine red", "beer mug",
+    "beer glass", "beer mugs", "whisky glass", "whiskey glass", "rum cake",
+    "fake leather", "fake plant", "fake plants", "fake flowers", "replica jersey",
+    "petrol car", "petrol bike", "petrol scooter", "petrol engine", "petrol variant",
+    "medicine box", "medicine cabinet", "medicine ball", "parrot green", "gin glass",
+    "puppy food", "puppy bed", "puppy toys", "kitten food", "parrot cage",
+    "hamster cage", "puppy crate",
+    "cigar box", "first copy of the book", "prescription glasses",
+    "prescription sunglasses", "prescription lenses"
+]
+
+# Typos are only forgiven on long terms, short ones collide with real words
+FUZZY_MIN_LENGTH = 7
+
+TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def _tokens(text: str) -> list:
+    return TOKEN.findall(text.lower())
+
+
+def _deletes(word: str) -> set:
+    return {word[:i] + word[i + 1:] for i in range(len(word))}
+
+
+class PolicyScreen:
+    """Local check of item descriptions against the disallowed-items policy.
+
+    The lexicon is compiled once into n-gram lookups: exact matches for every
+    term, singular forms for plurals, and a symmetric-delete table that
+    catches one-letter typos ("cocain", "marijuna") on long terms that are
+    not themselves dictionary words. Allowed
+    phrases such as "toy gun" are removed before a hit is confirmed.
+    Everyday words like "petrol" or "wine" only count inside a sale phrase,
+    and a hit right after a negation ("not stolen") is ignored.
+    """
+
+    def __init__(self, lexicon: dict = POLICY_LEXICON, allowed_phrases: list = ALLOWED_PHRASES,
+                 context_terms: dict = CONTEXT_TERMS):
+        self.terms = {}
+        self.contextual = {term: item for item, terms in context_terms.items() for term in terms}
+        self.fuzzy = {}
+        # Multi-word terms keyed by their first word, longest first
+        self.phrases = {}
+        for item, terms in lexicon.items():
+            for term in terms:
+                key = " ".join(_tokens(term))
+                self.terms[key] = item
+                if " " in key:
+                    words = tuple(key.split())
+                    self.phrases.setdefault(words[0], []).append(words)
+                if " " not in key and len(key) >= FUZZY_MIN_LENGTH:
+                    for variant in _deletes(key) | {key}:
+                        self.fuzzy.setdefault(variant, key)
+
+        for candidates in self.phrases.values():
+            candidates.sort(key=len, reverse=True)
+
+        phrases = sorted((" ".join(_tokens(p)) for p in allowed_phrases), key=len, reverse=True)
+        self.allowed = re.compile(r"\b(?:" + "|".join(re.escape(p) for p in phrases) + r")\b")
+
+        # Listing vocabulary repeats heavily, so word verdicts are memoized
+        self._lookup = lru_cache(maxsize=65536)(self._lookup_word)
+
+    def _lookup_word(self, word: str):
+        for term in (word, word[:-1] if word.endswith("s") else None):
+            if term in self.contextual or term in self.terms:
+                return term
+        # A real word one letter off a term ("pirate", "mittens") is not a typo;
+        # a one-letter deletion can bring a long term below the minimum
+        if len(word) >= FUZZY_MIN_LENGTH - 1 and not query_speller.is_known(word):
+            if word in self.fuzzy:
+                return self.fuzzy[word]
+            for variant in _deletes(word):
+                if variant in self.fuzzy:
+                    return self.fuzzy[variant]
+        return None
+
+    def _negated(self, words: list, i: int) -> bool:
+        return any(word in NEGATIONS for word in words[max(0, i - 2):i])
+
+    def _in_sale_phrase(self, words: list, i: int) -> bool:
+        before = words[max(0, i - 2):i]
+        if before[-1:] and before[-1] in QUANTITY_WORDS:
+            return True
+        if len(before) == 2 and before[1] == "of" and before[0] in QUANTITY_WORDS:
+            return True
+        return any(tuple(words[i + 1:i + 1 + len(suffix)]) == suffix for suffix in SALE_SUFFIXES)
+
+    def _first_hit(self, words: list):
+        for i, word in enumerate(words):
+            for phrase in self.phrases.get(word, ()):
+                if tuple(words[i:i + len(phrase)]) == phrase and not self._negated(words, i):
+                    term = " ".join(phrase)
+                    return {"item": self.terms[term], "term": term, "matched": term}
+
+            term = self._lookup(word)
+            if not term or self._negated(words, i):
+                continue
+            if term in self.contextual:
+                if self._in_sale_phrase(words, i):
+                    return {"item": self.contextual[term], "term": term, "matched": word}
+                continue
+            return {"item": self.terms[term], "term": term, "matched": word}
+        return None
+
+    def screen(self, text: str):
+        """Return the first policy hit in `text`, or None if it looks allowed"""
+        normalized = " ".join(_tokens(text))
+        if not self._first_hit(normalized.split()):
+            return None
+        # Only text with a hit pays for the allowed-phrase pass
+        return self._first_hit(self.allowed.sub(" | ", normalized).split())
+
+
+def policy_response(violation: dict) -> str:
+    """User-facing reply for a blocked listing"""
+    allowed = ", ".join(ALLOWED_ITEMS[:6])
+    return (
+        f"🚫 **I can't help list this item.**\n\n"
+        f"**{violation['item']}** are not allowed on our marketplace under our item policy, "
+        f"so listings for them are removed.\n\n"
+        f"✅ **You can sell things like:** {allowed}, and more.\n\n"
+        f"If I misunderstood and your item is something else, tell me a bit more about it!"
+    )
+
+
+policy_screen = PolicyScreen()
+screen_item = policy_screen.screen
@@ -0,0 +1,257 @@
+import json
+import logging
+import os
+import re
+import threading
+import time
+from array import array
+from search_parser_tool import query_speller, search_parser_tool
+
+logger = logging.getLogger(__name__)
+
+WILDCARD = "*"
+
+
+def normalize_field(value) -> str:
+    """Lowercase, strip punctuation and collapse spaces so keys compare equal"""
+    if value is None:
+        return WILDCARD
+    text = re.sub(r"[^a-z0-9]+", " ", str(value).lower()).strip()
+    return text or WILDCARD
+
+
+def parse_price(value):
+    """Read a price like 25000, "25,000" or "₹25k" as a float, or None"""
+    if isinstance(value, (int, float)):
+        return float(value) if value > 0 else None
+    if not isinstance(value, str):
+        return None
+    match = re.search(r"(\d[\d,]*(?:\.\d+)?)\s*(k)?", value.lower())
+    if not match:
+        return None
+    price = float(match.group(1).replace(",", ""))
+    if match.group(2):
+        price *= 1000
+    return price if price > 0 else None
+
+
+class PriceIndex:
+    """Recency-weighted price quantiles for past listings.
+
+    Observations are stored per (category, brand, model) in typed arrays and
+    rolled up to (category, brand, *) and (category, *, *) so lookups fall
+    back to a coarser level when a specific model has no history. Summaries
+    are cached per key and only recomputed after new data arrives, so a
+    lookup is a couple of dict hits.
+    """
+
+    def __init__(self, half_life_days: float = 90, max_samples: int = 200, min_samples: int = 5):
+        self.half_life = half_life_days * 86400
+        self.max_samples = max_samples
+        self.min_samples = min_samples
+        self.path = None
+        self._prices = {}
+        self._times = {}
+        self._leaves = set()
+        self._by_brand = {}
+        self._summaries = {}
+        self._lock = threading.Lock()
+        self._last_save = 0.0
+
+    def _levels(self, leaf):
+        category, brand, model = leaf
+        yield leaf
+        if model != WILDCARD:
+            yield (category, brand, WILDCARD)
+        if brand != WILDCARD:
+            yield (category, WILDCARD, WILDCARD)
+
+    def _append(self, key, price: float, timestamp: float):
+        prices = self._prices.get(key)
+        if prices is None:
+            prices = self._prices[key] = array("f")
+            self._times[key] = array("d")
+        prices.append(price)
+        self._times[key].append(timestamp)
+        if len(prices) > self.max_samples:
+            del prices[0]
+            del self._times[key][0]
+        self._summaries.pop(key, None)
+
+    def vocabulary(self) -> set:
+        """Brand and model names seen in past listings"""
+        with self._lock:
+            return {field for _, brand, model in self._leaves for field in (brand, model) if field != WILDCARD}
+
+    def record(self, category, brand, model, price, timestamp: float = None):
+        """Add one listing outcome; returns False if the price is unusable"""
+        price = parse_price(price)
+        if price is None:
+            return False
+
+        leaf = (normalize_field(category), normalize_field(brand), normalize_field(model))
+        timestamp = timestamp or time.time()
+
+        with self._lock:
+            self._leaves.add(leaf)
+            if leaf[1] != WILDCARD:
+                self._by_brand.setdefault(leaf[1], set()).add(leaf)
+            for key in self._levels(leaf):
+                self._append(key, price, timestamp)
+        return True
+
+    def _summarize(self, key):
+        prices = self._prices[key]
+        times = self._times[key]
+        now = time.time()
+
+        weighted = sorted(
+            (price, 0.5 ** ((now - seen) / self.half_life))
+            for price, seen in zip(prices, times)
+        )
+        total = sum(weight for _, weight in weighted)
+
+        def quantile(q):
+            target = q * total
+            running = 0.0
+            for price, weight in weighted:
+                running += weight
+                if running >= target:
+                    return round(price)
+            return round(weighted[-1][0])
+
+        return {
+            "category": key[0],
+            "brand": key[1],
+            "model": key[2],
+            "count": len(prices),
+            "min": round(weighted[0][0]),
+            "p25": quantile(0.25),
+            "median": quantile(0.5),
+            "p75": quantile(0.75),
+            "max": round(weighted[-1][0]),
+            "computed_at": now
+        }
+
+    def lookup(self, category=None, brand=None, model=None):
+        """Most specific summary available for the item, or None"""
+        leaf = (normalize_field(category), normalize_field(brand), normalize_field(model))
+        for key in self._levels(leaf):
+            if key not in self._prices:
+                continue
+            summary = self._summaries.get(key)
+            # Recency weights drift slowly, refresh cached summaries hourly
+            if summary is None or time.time() - summary["computed_at"] > 3600:
+                with self._lock:
+                    summary = self._summaries[key] = self._summarize(key)
+            return summary
+        return None
+
+    def match_text(self, text: str, category: str = None):
+        """Summary of the most specific known item mentioned in free text.
+
+        A named model wins. A brand alone is only matched within `category`,
+        since one brand spans phones and TVs alike; with no category and no
+        model, only the category-wide summary (or None) is returned.
+        """
+        normalized = f" {normalize_field(text)} "
+        tokens = set(normalized.split())
+        category_key = normalize_field(category) if category else None
+
+        # Snapshot the mentioned brands, record() may be adding leaves meanwhile
+        with self._lock:
+            mentioned = [
+                (brand, tuple(leaves)) for brand, leaves in self._by_brand.items()
+                if brand in tokens or f" {brand} " in normalized
+            ]
+
+        model_match = brand_match = None
+        for brand, leaves in mentioned:
+            for leaf in leaves:
+                if category_key and leaf[0] != category_key:
+                    continue
+                model = leaf[2]
+                if model != WILDCARD and f" {model} " in normalized:
+                    if model_match is None or len(model) > len(model_match[2]):
+                        model_match = leaf
+                elif category_key and brand_match is None:
+                    brand_match = (category_key, brand, WILDCARD)
+
+        if model_match or brand_match:
+            return self.lookup(*(model_match or brand_match))
+        if category:
+            return self.lookup(category)
+        return None
+
+    def to_dict(self) -> dict:
+        entries = {}
+        for leaf in self._leaves:
+            entries["|".join(leaf)] = [
+                [round(price) for price in self._prices[leaf]],
+                [int(seen) for seen in self._times[leaf]]
+            ]
+        return {"version": 1, "entries": entries}
+
+    def save(self, path: str = None, min_interval: float = 0):
+        """Write the leaf observations to disk; aggregates are rebuilt on load"""
+        path = path or self.path
+        if not path or time.time() - self._last_save < min_interval:
+            return
+        with self._lock:
+            data = self.to_dict()
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+        self._last_save = time.time()
+
+    @classmethod
+    def load(cls, path: str, **kwargs):
+        index = cls(**kwargs)
+        index.path = path
+        if path and os.path.exists(path):
+            try:
+                with open(path) as f:
+                    data = json.load(f)
+                for key, (prices, times) in data.get("entries", {}).items():
+                    category, brand, model = key.split("|")
+                    for price, seen in zip(prices, times):
+                        index.record(category, brand, model, price, seen)
+            except Exception as e:
+                logger.error(f"Error loading price index: {e}")
+        return index
+
+
+def listing_price(generated_listing: dict):
+    """Suggested price of a generated listing, else the middle of its range"""
+    price_range = generated_listing.get("price_range") or {}
+    price = parse_price(price_range.get("suggested"))
+    if price is None:
+        low, high = parse_price(price_range.get("min")), parse_price(price_range.get("max"))
+        if low and high:
+            price = (low + high) / 2
+    return price
+
+
+def record_listing(listing_data: dict, generated_listing: dict, save: bool = True):
+    """Feed a generated listing's suggested price into the shared index"""
+    price = listing_price(generated_listing)
+    if price is None:
+        return
+
+    category = (listing_data.get("category") or listing_data.get("item_type")
+                or generated_listing.get("category"))
+    if category:
+        category = search_parser_tool(str(category))["category"] or category
+    price_index.record(category, listing_data.get("brand"), listing_data.get("model"), price)
+    if save:
+        price_index.save(min_interval=30)
+
+
+price_index = PriceIndex.load(
+    os.getenv("PRICE_INDEX_PATH", "price_index.json"),
+    half_life_days=float(os.getenv("PRICE_INDEX_HALF_LIFE_DAYS", "90")),
+    min_samples=int(os.getenv("PRICE_INDEX_MIN_SAMPLES", "5"))
+)
+# Names from past listings join the search typo corrector's dictionary
+query_speller.learn(*price_index.vocabulary())
@@ -0,0 +1,153 @@
+"""Replay recorded chat traffic against main.app with the local LLM backend.
+
+Usage: python replay_traffic.py traces.jsonl --speed 10 [--llm-latency-ms 800]
+
+Traces come from TRAFFIC_RECORD_PATH. Arrival times are compressed by
+--speed, and each user's messages are sent strictly in order, each one
+after the previous reply, so sessions keep their real conversation
+shape.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from collections import defaultdict
+
+
+async def post_json(app, path: str, payload: dict):
+    """Send one JSON POST straight into an ASGI app; returns (status, body)"""
+    body = json.dumps(payload).encode("utf-8")
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode("utf-8"),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [
+            (b"host", b"replay"),
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode("ascii"))
+        ],
+        "client": ("replay", 0),
+        "server": ("replay", 80)
+    }
+    response = {"status": None, "body": b""}
+    finished = asyncio.Event()
+    request_sent = False
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+        elif message["type"] == "http.response.body":
+            response["body"] += message.get("body", b"")
+            if not message.get("more_body"):
+                finished.set()
+
+    await app(scope, receive, send)
+    return response["status"], response["body"]
+
+
+def load_traces(path: str) -> list:
+    with open(path, encoding="utf-8") as f:
+        traces = [json.loads(line) for line in f if line.strip()]
+    return sorted(traces, key=lambda trace: trace["ts"])
+
+
+def percentile(values: list, q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def replay(traces: list, speed: float) -> list:
+    import main
+
+    by_user = defaultdict(list)
+    for trace in traces:
+        by_user[trace["user"]].append(trace)
+
+    first_ts = traces[0]["ts"]
+    clock_start = time.monotonic()
+    results = []
+
+    async def drive_user(user: str, user_traces: list):
+        for trace in user_traces:
+            # Wait for the compressed arrival time, but never overtake the previous reply
+            due = (trace["ts"] - first_ts) / speed
+            delay = due - (time.monotonic() - clock_start)
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            started = time.perf_counter()
+            status, _ = await post_json(main.app, "/api/chat", {
+                "message": trace["message"],
+                "user_id": f"replay-{user}"
+            })
+            results.append({
+                "user": user,
+                "status": status,
+                "latency_ms": (time.perf_counter() - started) * 1000,
+                "recorded_ms": trace.get("timings_ms", {}).get("total"),
+                "lag_ms": max(0.0, -delay * 1000)
+            })
+
+    await asyncio.gather(*(drive_user(user, user_traces) for user, user_traces in by_user.items()))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded chat traffic against main.app")
+    parser.add_argument("path", help="JSONL file written by the traffic recorder")
+    parser.add_argument("--speed", type=float, default=1.0, help="time compression factor (N x real time)")
+    parser.add_argument("--llm-latency-ms", type=float, default=None, help="simulated model latency per call")
+    args = parser.parse_args()
+
+    # Replays always run against the local stand-in, never the real model
+    os.environ["LLM_BACKEND"] = "local"
+    os.environ.pop("TRAFFIC_RECORD_PATH", None)
+    # Stores start empty and in memory, so production files are neither read nor written
+    for store in ("USAGE_STORE_PATH", "PRICE_INDEX_PATH", "SUGGEST_INDEX_PATH", "SAVED_SEARCHES_PATH"):
+        os.environ[store] = ""
+    if args.llm_latency_ms is not None:
+        os.environ["LOCAL_LLM_LATENCY_MS"] = str(args.llm_latency_ms)
+
+    traces = load_traces(args.path)
+    if not traces:
+        print("No traces to replay")
+        return
+
+    wall_start = time.monotonic()
+    results = asyncio.run(replay(traces, args.speed))
+    wall = time.monotonic() - wall_start
+
+    latencies = [result["latency_ms"] for result in results]
+    statuses = defaultdict(int)
+    for result in results:
+        statuses[result["status"]] += 1
+
+    recorded_span = traces[-1]["ts"] - traces[0]["ts"]
+    print(f"Replayed {len(results)} turns from {len({t['user'] for t in traces})} users")
+    print(f"Recorded span {recorded_span:.1f}s, replayed in {wall:.1f}s at {args.speed}x")
+    print(f"Status codes: {dict(statuses)}")
+    print(f"Latency ms  p50={percentile(latencies, 0.5):.1f}  p95={percentile(latencies, 0.95):.1f}  "
+          f"p99={percentile(latencies, 0.99):.1f}  max={max(latencies):.1f}")
+    lagged = [result for result in results if result["lag_ms"] > 0]
+    print(f"Turns sent late because the previous reply was still pending: {len(lagged)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+# Leaf frames of threads that are parked, not doing work
+IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+    ("base_events.py", "_run_once"),
+}
+
+
+class SamplingProfiler:
+    """Low-overhead wall-clock sampler for every Python thread in the worker.
+
+    A background thread snapshots all stacks every `interval` seconds and
+    counts them in folded form ("outer;inner;leaf count"), which
+    flamegraph.pl, speedscope and most flamegraph viewers read directly.
+    Threads parked in a wait are skipped unless `include_idle` is set.
+    """
+
+    def __init__(self, interval: float = 0.01, include_idle: bool = False):
+        self.interval = interval
+        self.include_idle = include_idle
+        self.samples = Counter()
+        self.sample_count = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _frame_label(self, frame) -> str:
+        code = frame.f_code
+        return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+    def _sample(self):
+        own_id = threading.get_ident()
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id:
+                continue
+            leaf = (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name)
+            if not self.include_idle and leaf in IDLE_FRAMES:
+                continue
+
+            stack = []
+            while frame is not None:
+                stack.append(self._frame_label(frame))
+                frame = frame.f_back
+            self.samples[";".join(reversed(stack))] += 1
+        self.sample_count += 1
+
+    def _run(self):
+        while not self._stop.is_set():
+            started = time.perf_counter()
+            self._sample()
+            self._stop.wait(max(0.0, self.interval - (time.perf_counter() - started)))
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> str:
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        return self.folded()
+
+    def folded(self) -> str:
+        return "\n".join(f"{stack} {count}" for stack, count in self.samples.most_common()) + "\n"
+
+
+class ProfilingSession:
+    """One admin-requested profiling window, ended by time or request count"""
+
+    def __init__(self, max_requests: int = None, interval: float = 0.01):
+        self.profiler = SamplingProfiler(interval)
+        self.max_requests = max_requests
+        self.requests_seen = 0
+        self.done = asyncio.Event()
+
+    def request_finished(self):
+        self.requests_seen += 1
+        if self.max_requests and self.requests_seen >= self.max_requests:
+            self.done.set()
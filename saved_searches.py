@@ -0,0 +1,168 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from percolator import Percolator
+from price_index import listing_price
+from search_parser_tool import LOCATION_KEYWORDS, search_parser_tool
+
+logger = logging.getLogger(__name__)
+
+LISTING_CONDITIONS = ["new", "excellent", "good", "fair", "poor", "used"]
+
+
+def listing_features(listing_data: dict, generated_listing: dict) -> dict:
+    """What the percolator matches on, taken from a generated listing"""
+    category = (listing_data.get("category") or listing_data.get("item_type")
+                or generated_listing.get("category"))
+    if category:
+        category = search_parser_tool(str(category))["category"] or category
+
+    condition_text = str(listing_data.get("condition") or "").lower()
+    condition = next((word for word in LISTING_CONDITIONS if word in condition_text), None)
+
+    location_text = str(listing_data.get("location") or "").lower()
+    location = next((city for city in LOCATION_KEYWORDS if city in location_text), location_text or None)
+
+    text = " ".join(str(part) for part in [
+        *(generated_listing.get("titles") or [])[:1],
+        generated_listing.get("description"),
+        *(generated_listing.get("tags") or []),
+        listing_data.get("item_type"),
+        listing_data.get("category"),
+        listing_data.get("brand"),
+        listing_data.get("model")
+    ] if part)
+
+    return {
+        "category": category,
+        "price": listing_price(generated_listing),
+        "condition": condition,
+        "location": location,
+        "text": text
+    }
+
+
+class SavedSearches:
+    """Buyers' saved searches and the notifications new listings raise for them.
+
+    Searches are stored as search_parser_tool output in a Percolator and
+    in an append-only JSONL log that is replayed in one batch at startup.
+    Notifications wait in a short per-user queue until the app fetches them.
+    """
+
+    def __init__(self, path: str = None, max_notifications: int = 50):
+        self.path = path
+        self.max_notifications = max_notifications
+        self.percolator = Percolator()
+        self.owners = {}
+        self.by_user = {}
+        self.notifications = {}
+        self.notified = 0
+        self._lock = threading.Lock()
+
+    def _log(self, event: dict):
+        if not self.path:
+            return
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(event, ensure_ascii=False) + "\n")
+        except Exception as e:
+            logger.error(f"Error writing saved searches: {e}")
+
+    def _own(self, search_id: int, user_id: str, query: str, filters: dict):
+        self.owners[search_id] = (user_id, query, filters)
+        self.by_user.setdefault(user_id, set()).add(search_id)
+
+    def _disown(self, search_id: int):
+        user_id, _, _ = self.owners.pop(search_id)
+        self.by_user[user_id].discard(search_id)
+        self.percolator.remove(search_id)
+
+    def save_search(self, user_id: str, query: str) -> dict:
+        filters = search_parser_tool(query)
+        with self._lock:
+            search_id = self.percolator.add(filters)
+            self._own(search_id, user_id, query, filters)
+            self._log({"op": "add", "user": user_id, "query": query, "filters": filters})
+        return {"id": search_id, "query": query, "filters": filters}
+
+    def remove_search(self, user_id: str, search_id: int) -> bool:
+        with self._lock:
+            owner = self.owners.get(search_id)
+            if not owner or owner[0] != user_id:
+                return False
+            self._disown(search_id)
+            self._log({"op": "remove", "id": search_id})
+        return True
+
+    def list_searches(self, user_id: str) -> list:
+        with self._lock:
+            return [
+                {"id": search_id, "query": self.owners[search_id][1], "filters": self.owners[search_id][2]}
+                for search_id in sorted(self.by_user.get(user_id, ()))
+            ]
+
+    def notify_listing(self, listing_data: dict, generated_listing: dict) -> int:
+        """Queue a notification for every saved search the new listing matches"""
+        return self.notify_batch([(listing_data, generated_listing)])[0]
+
+    def notify_batch(self, listings: list) -> list:
+        """notify_listing for many (listing_data, generated_listing) pairs under
+        one lock; returns the number of searches each listing matched"""
+        features = [listing_features(listing_data, generated) for listing_data, generated in listings]
+        now = int(time.time())
+        with self._lock:
+            matches = self.percolator.match_batch(features)
+            for (_, generated), listing, matched in zip(listings, features, matches):
+                summary = {
+                    "title": (generated.get("titles") or [None])[0],
+                    "category": listing["category"],
+                    "price": listing["price"],
+                    "location": listing["location"],
+                    "created_at": now
+                }
+                for search_id in matched:
+                    user_id, query, _ = self.owners[search_id]
+                    queue = self.notifications.setdefault(user_id, deque(maxlen=self.max_notifications))
+                    queue.append({"search_id": search_id, "query": query, "listing": summary})
+                self.notified += len(matched)
+        return [len(matched) for matched in matches]
+
+    def pop_notifications(self, user_id: str) -> list:
+        with self._lock:
+            queue = self.notifications.pop(user_id, None)
+        return list(queue or [])
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "saved": len(self.percolator),
+                "users": sum(1 for ids in self.by_user.values() if ids),
+                "notified": self.notified
+            }
+
+    @classmethod
+    def load(cls, path: str):
+        store = cls(path)
+        if not path or not os.path.exists(path):
+            return store
+        try:
+            with open(path, encoding="utf-8") as f:
+                events = [json.loads(line) for line in f if line.strip()]
+            # Ids are handed out in add order, so one batch reproduces them
+            adds = [event for event in events if event["op"] == "add"]
+            ids = store.percolator.add_batch([event["filters"] for event in adds])
+            for search_id, event in zip(ids, adds):
+                store._own(search_id, event["user"], event["query"], event["filters"])
+            for event in events:
+                if event["op"] == "remove" and event["id"] in store.owners:
+                    store._disown(event["id"])
+        except Exception as e:
+            logger.error(f"Error loading saved searches: {e}")
+        return store
+
+
+saved_searches = SavedSearches.load(os.getenv("SAVED_SEARCHES_PATH", "saved_searches.jsonl"))
@@ -1,9 +1,192 @@
+import logging
+import os
 import re
+from spell_index import SpellIndex
+
+logger = logging.getLogger(__name__)
+
+# Search vocabulary, also the dictionary the typo corrector works from
+CATEGORIES = {
+    # Electronics
+    'electronics': 'Electronics', 'phone': 'Electronics', 'laptop': 'Electronics',
+    'mobile': 'Electronics', 'computer': 'Electronics', 'tv': 'Electronics',
+    'iphone': 'Electronics', 'samsung': 'Electronics', 'macbook': 'Electronics',
+    'ipad': 'Electronics', 'tablet': 'Electronics', 'android': 'Electronics', 'gadget': 'Electronics',
+    
+    # Fashion
+    'fashion': 'Fashion', 'clothes': 'Fashion', 'clothing': 'Fashion',
+    'shirt': 'Fashion', 'jeans': 'Fashion', 'shoes': 'Fashion',
+    'dress': 'Fashion', 'jacket': 'Fashion', 'sneakers': 'Fashion',
+    'bag': 'Fashion', 'watch': 'Fashion', 'handbag': 'Fashion',
+    
+    # Home & Garden
+    'home': 'Home & Garden', 'furniture': 'Home & Garden',
+    'sofa': 'Home & Garden', 'table': 'Home & Garden', 'chair': 'Home & Garden',
+    'bed': 'Home & Garden', 'mirror': 'Home & Garden', 'lamp': 'Home & Garden',
+    'garden': 'Home & Garden', 'kitchen': 'Home & Garden',
+    
+    # Sports
+    'sports': 'Sports', 'fitness': 'Sports', 'gym': 'Sports',
+    'bike': 'Sports', 'bicycle': 'Sports', 'football': 'Sports',
+    'cricket': 'Sports', 'tennis': 'Sports', 'badminton': 'Sports',
+    
+    # Books
+    'books': 'Books', 'novel': 'Books', 'textbook': 'Books',
+    'magazine': 'Books', 'comic': 'Books', 'manual': 'Books'
+}
+
+BRANDS = [
+    'apple', 'samsung', 'oneplus', 'xiaomi', 'redmi', 'realme', 'vivo', 'oppo',
+    'motorola', 'nokia', 'google', 'pixel', 'lenovo', 'dell', 'asus', 'acer',
+    'microsoft', 'sony', 'panasonic', 'philips', 'boat', 'jbl', 'bose', 'canon',
+    'nikon', 'fujifilm', 'gopro', 'nike', 'adidas', 'puma', 'reebok', 'skechers',
+    'levis', 'zara', 'titan', 'fossil', 'casio', 'ikea', 'godrej', 'nilkamal',
+    'whirlpool', 'voltas', 'daikin', 'haier', 'bajaj', 'honda', 'hero', 'yamaha',
+    'suzuki', 'royal', 'enfield', 'firefox', 'decathlon', 'yonex', 'cosco',
+    # Product lines people search by name
+    'galaxy', 'thinkpad', 'ideapad', 'vivobook', 'pavilion', 'inspiron',
+    'airpods', 'playstation', 'xbox', 'kindle', 'activa', 'splendor', 'pulsar'
+]
+
+CONDITION_WORDS = ['new', 'brand', 'unused', 'used', 'second', 'hand', 'pre-owned', 'excellent', 'good', 'fair', 'poor', 'refurbished']
+
+LOCATION_KEYWORDS = ['near me', 'nearby', 'local', 'delhi', 'mumbai', 'bangalore', 'chennai', 'hyderabad', 'pune', 'kolkata']
+
+STOP_WORDS = {
+    'show', 'find', 'get', 'under', 'in', 'for', 'with', 'the', 'a', 'an', 
+    'me', 'i', 'want', 'need', 'looking', 'search', 'budget', 'cheap',
+    'expensive', 'new', 'used', 'good', 'excellent', 'fair', 'poor',
+    'to', 'from', 'between', 'and', 'or', 'is', 'are', 'be', 'have', 'buy'
+}
+
+# Everyday query words that sit one typo away from vocabulary entries
+COMMON_WORDS = [
+    'below', 'less', 'than', 'maximum', 'upto', 'price', 'sort', 'affordable',
+    'premium', 'latest', 'newest', 'recent', 'popular', 'photos', 'negotiable',
+    'urgent', 'quick', 'cable', 'charger', 'cover', 'case', 'screen', 'glass',
+    'black', 'white', 'blue', 'green', 'brown', 'size', 'large', 'small', 'pro',
+    'max', 'plus', 'mini', 'ultra', 'storage', 'battery', 'camera', 'speaker',
+    'headphones', 'earphones', 'keyboard', 'mouse', 'monitor', 'printer',
+    'fridge', 'washing', 'machine', 'cooler', 'fan', 'scooter', 'car', 'cycle',
+    'wooden', 'steel', 'study', 'office', 'dining', 'wardrobe', 'almirah',
+    'kids', 'baby', 'toys', 'guitar', 'piano', 'sell', 'buy', 'sale'
+]
+
+# Things people buy that have no category keyword of their own
+PRODUCT_WORDS = [
+    'headphones', 'earphones', 'speaker', 'camera', 'keyboard', 'mouse', 'monitor',
+    'printer', 'fridge', 'washing machine', 'cooler', 'fan', 'scooter', 'car',
+    'cycle', 'wardrobe', 'almirah', 'toys', 'guitar', 'piano'
+]
+
+# Specification slots: pattern and how the captured value is written back
+SPEC_PATTERNS = [
+    (re.compile(r'\b(\d+)\s*(gb|tb)\s*(ram|storage|rom|ssd|hdd)\b'), '{0}{1} {2}'),
+    (re.compile(r'\b(\d+)\s*(gb|tb)\b(?!\s*(?:ram|storage|rom|ssd|hdd)\b)'), '{0}{1}'),
+    (re.compile(r'\b(\d+(?:\.\d+)?)\s*(?:inch|inches|")'), '{0} inch'),
+    (re.compile(r'\b(\d+)\s*mp\b'), '{0}mp camera'),
+    (re.compile(r'\b(\d+)\s*mah\b'), '{0}mah battery'),
+    (re.compile(r'\b(\d+)\s*hz\b'), '{0}hz'),
+    (re.compile(r'\b(\d+)\s*cc\b'), '{0}cc'),
+    (re.compile(r'\b(\d+)\s*seater\b'), '{0} seater'),
+    (re.compile(r'\b(\d+)(?:st|nd|rd|th)\s*gen\b'), 'gen {0}'),
+    (re.compile(r'\bsize\s*(\d+|xs|s|m|l|xl|xxl)\b'), 'size {0}')
+]
+FEATURE_WORDS = [
+    '5g', 'amoled', 'oled', 'ssd', 'gaming', 'wireless', 'bluetooth', 'waterproof',
+    'touchscreen', 'automatic', 'electric', 'foldable', 'wooden', 'leather', 'steel'
+]
+
+# Amounts given as a budget rather than a cap: "budget 20k", "around ₹15,000"
+BUDGET_PATTERN = re.compile(
+    r'(?:budget|around|about|approx\w*|rs\.?|₹|inr)\s*(?:is|of|:)?\s*(\d[\d,]*)\s*(k\b)?'
+    r'|\b(\d[\d,]*)\s*(k\b)?\s*(?:rs|rupees|inr)\b'
+    r'|^\s*(\d[\d,]*)\s*(k)?\s*$'
+)
+# Condition wanted, on whole words: "news" is not "new" and "I used to have" is
+# not "used". Quality words only count when they describe the condition,
+# "a good phone" says nothing about wear
+CONDITION_PATTERNS = [
+    (re.compile(r'\b(?:brand new|new|unused|sealed)\b'), 'new'),
+    (re.compile(r'\b(?:used(?!\s+to\b)|second hand|secondhand|pre-owned|preowned|refurbished)\b'), 'used'),
+    (re.compile(r'\b(excellent|good|fair)\s+(?:condition|shape)\b'), None)
+]
+FEATURE_WORD_PATTERN = re.compile(r'\b(' + '|'.join(FEATURE_WORDS) + r')\b')
+SPEC_VOCABULARY = ['ram', 'storage', 'rom', 'inch', 'inches', 'seater', 'gen', 'rupees']
+
+
+# Common English and product words, plus a system dictionary when the host has one
+LEXICON_PATHS = [
+    os.getenv("SPELL_LEXICON_PATH") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "spell_lexicon.txt"),
+    "/usr/share/dict/words"
+]
+
+
+def load_lexicon(paths: list = LEXICON_PATHS) -> set:
+    words = set()
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        try:
+            with open(path, encoding="utf-8") as f:
+                words.update(line.strip().lower() for line in f if line.strip() and not line.startswith("#"))
+        except Exception as e:
+            logger.error(f"Error loading spelling lexicon {path}: {e}")
+    return words
+
+
+def build_query_speller() -> SpellIndex:
+    """Corrects typos towards category and brand keys only; every other known
+    word, and anything in the lexicon, is left as typed"""
+    speller = SpellIndex()
+    for phrase in list(CATEGORIES) + BRANDS:
+        for word in re.findall(r"[a-z]+", phrase):
+            # Curated words outrank ones later mined from listings
+            speller.add(word, count=10)
+    vocabulary = (CONDITION_WORDS + LOCATION_KEYWORDS + list(STOP_WORDS) + COMMON_WORDS
+                  + PRODUCT_WORDS + FEATURE_WORDS + SPEC_VOCABULARY)
+    speller.protect(*(word for phrase in vocabulary for word in re.findall(r"[a-z]+", phrase)))
+    speller.protect(*load_lexicon())
+    return speller
+
+
+query_speller = build_query_speller()
+
+
+def learn_listing_vocabulary(listing_data: dict, generated_listing: dict):
+    """Teach the query corrector the words sellers actually use: brands become
+    correction targets, the rest are only protected from correction"""
+    query_speller.learn(listing_data.get("brand"))
+    query_speller.protect(*re.findall(r"[a-z]+", " ".join(str(part) for part in [
+        listing_data.get("model"),
+        generated_listing.get("category"),
+        *(generated_listing.get("titles") or []),
+        *(generated_listing.get("tags") or [])
+    ] if part).lower()))
+
+def parse_amount(digits: str, thousands: str = None) -> int:
+    return int(digits.replace(",", "")) * (1000 if thousands else 1)
+
+
+def parse_specs(query_lower: str) -> list:
+    """Specifications named in the query, normalized ("8gb ram", "6.5 inch")"""
+    specs = []
+    for pattern, template in SPEC_PATTERNS:
+        for match in pattern.finditer(query_lower):
+            specs.append(template.format(*match.groups()))
+    specs.extend(word for word in FEATURE_WORD_PATTERN.findall(query_lower)
+                 if not any(word in spec for spec in specs))
+    return list(dict.fromkeys(specs))
+
 
 def search_parser_tool(query: str) -> dict:
     """Parse natural language search queries into structured filters for marketplace search"""
     
-    query_lower = query.lower().strip()
+    query_lower = query.strip().lower()
+    # Typos are only fixed for spotting the category, brand and item, so
+    # "iphon" and "sofaa" still hit the vocabulary; the rest reads the text as typed
+    corrections = query_speller.corrections(query_lower)
+    slot_text = query_speller.correct(query_lower) if corrections else query_lower
     
     # Extract price ranges with comprehensive patterns
     price_patterns = [
@@ -27,58 +210,41 @@ def search_parser_tool(query: str) -> dict:
             break
     
     # Enhanced category detection
-    categories = {
-        # Electronics
-        'electronics': 'Electronics', 'phone': 'Electronics', 'laptop': 'Electronics',
-        'mobile': 'Electronics', 'computer': 'Electronics', 'tv': 'Electronics',
-        'iphone': 'Electronics', 'samsung': 'Electronics', 'macbook': 'Electronics',
-        'ipad': 'Electronics', 'android': 'Electronics', 'gadget': 'Electronics',
-        
-        # Fashion
-        'fashion': 'Fashion', 'clothes': 'Fashion', 'clothing': 'Fashion',
-        'shirt': 'Fashion', 'jeans': 'Fashion', 'shoes': 'Fashion',
-        'dress': 'Fashion', 'jacket': 'Fashion', 'sneakers': 'Fashion',
-        'bag': 'Fashion', 'watch': 'Fashion', 'handbag': 'Fashion',
-        
-        # Home & Garden
-        'home': 'Home & Garden', 'furniture': 'Home & Garden',
-        'sofa': 'Home & Garden', 'table': 'Home & Garden', 'chair': 'Home & Garden',
-        'bed': 'Home & Garden', 'mirror': 'Home & Garden', 'lamp': 'Home & Garden',
-        'garden': 'Home & Garden', 'kitchen': 'Home & Garden',
-        
-        # Sports
-        'sports': 'Sports', 'fitness': 'Sports', 'gym': 'Sports',
-        'bike': 'Sports', 'bicycle': 'Sports', 'football': 'Sports',
-        'cricket': 'Sports', 'tennis': 'Sports', 'badminton': 'Sports',
-        
-        # Books
-        'books': 'Books', 'novel': 'Books', 'textbook': 'Books',
-        'magazine': 'Books', 'comic': 'Books', 'manual': 'Books'
-    }
-    
     category = None
-    for key, cat in categories.items():
-        if key in query_lower:
+    for key, cat in CATEGORIES.items():
+        if key in slot_text:
             category = cat
             break
     
+    # The thing being searched for, and the brand it should be
+    slot_words = re.findall(r'\b\w+\b', slot_text)
+    item = next((word for word in slot_words if word in CATEGORIES and word not in BRANDS), None)
+    if item is None:
+        item = next((word for word in PRODUCT_WORDS if re.search(rf'\b{word}\b', query_lower)), None)
+    brand = next((word for word in slot_words if word in BRANDS), None)
+    
+    # A stated budget counts as the upper bound when no cap was given
+    budget = price_max
+    if budget is None:
+        match = BUDGET_PATTERN.search(query_lower)
+        if match:
+            digits, thousands = next((match.group(i), match.group(i + 1)) for i in (1, 3, 5) if match.group(i))
+            # A bare "2" answers some other question, not the budget
+            budget = parse_amount(digits, thousands)
+            if budget < 100:
+                budget = None
+    
     # Extract condition with more variations
     condition = "any"
-    if any(word in query_lower for word in ['new', 'brand new', 'unused']):
-        condition = "new"
-    elif any(word in query_lower for word in ['used', 'second hand', 'pre-owned']):
-        condition = "used"
-    elif 'excellent' in query_lower:
-        condition = "excellent"
-    elif 'good' in query_lower:
-        condition = "good"
-    elif 'fair' in query_lower:
-        condition = "fair"
+    for pattern, value in CONDITION_PATTERNS:
+        match = pattern.search(query_lower)
+        if match:
+            condition = value or match.group(1)
+            break
     
     # Extract location hints
     location = None
-    location_keywords = ['near me', 'nearby', 'local', 'delhi', 'mumbai', 'bangalore', 'chennai', 'hyderabad', 'pune', 'kolkata']
-    for loc in location_keywords:
+    for loc in LOCATION_KEYWORDS:
         if loc in query_lower:
             location = loc
             break
@@ -95,19 +261,12 @@ def search_parser_tool(query: str) -> dict:
         sort_by = "popular"
     
     # Extract keywords (remove common stop words and price/condition words)
-    stop_words = {
-        'show', 'find', 'get', 'under', 'in', 'for', 'with', 'the', 'a', 'an', 
-        'me', 'i', 'want', 'need', 'looking', 'search', 'budget', 'cheap',
-        'expensive', 'new', 'used', 'good', 'excellent', 'fair', 'poor',
-        'to', 'from', 'between', 'and', 'or', 'is', 'are', 'be', 'have'
-    }
-    
     # Extract meaningful words
     words = re.findall(r'\b\w+\b', query_lower)
     keywords = []
     
     for word in words:
-        if (word not in stop_words and 
+        if (word not in STOP_WORDS and 
             not word.isdigit() and 
             len(word) > 2 and
             not re.match(r'\d+k?', word)):  # Exclude price patterns
@@ -124,6 +283,11 @@ def search_parser_tool(query: str) -> dict:
         "condition": condition,
         "location": location,
         "sort_by": sort_by,
+        "item": item,
+        "brand": brand,
+        "specs": parse_specs(query_lower),
+        "budget": budget,
+        "corrections": corrections,
         "filters": {
             "has_photos": True if 'photos' in query_lower else None,
             "negotiable": True if 'negotiable' in query_lower else None,
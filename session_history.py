@@ -0,0 +1,86 @@
+import os
+import sys
+import time
+import zlib
+
+# Assistant replies shorter than this are not worth compressing
+COMPRESS_MIN_BYTES = int(os.getenv("SESSION_COMPRESS_MIN_BYTES", "512"))
+COMPACT_IDLE_SECONDS = float(os.getenv("SESSION_COMPACT_IDLE_SECONDS", "300"))
+
+
+class Message:
+    """One history entry: an interned role and text that may be zlib-packed.
+
+    `content` always reads back as str. The packed and plain forms share
+    one slot, so a reader never sees a half-compacted message.
+    """
+
+    __slots__ = ("role", "_content")
+
+    def __init__(self, role: str, content: str):
+        self.role = sys.intern(role)
+        self._content = content
+
+    @property
+    def content(self) -> str:
+        content = self._content
+        if isinstance(content, bytes):
+            return zlib.decompress(content).decode("utf-8")
+        return content
+
+    @property
+    def compressed(self) -> bool:
+        return isinstance(self._content, bytes)
+
+    def compress(self):
+        content = self._content
+        if isinstance(content, str) and len(content) >= COMPRESS_MIN_BYTES:
+            packed = zlib.compress(content.encode("utf-8"), 6)
+            if len(packed) < len(content):
+                self._content = packed
+
+    def inflate(self):
+        if isinstance(self._content, bytes):
+            self._content = self.content
+
+    def __repr__(self) -> str:
+        return f"Message({self.role!r}, {self.content[:40]!r})"
+
+
+class SessionHistory(list):
+    """A user's message list that remembers when it was last used"""
+
+    __slots__ = ("last_active", "compacted")
+
+    def __init__(self, messages=()):
+        super().__init__(messages)
+        self.last_active = time.monotonic()
+        self.compacted = False
+
+    def add(self, role: str, content: str):
+        self.append(Message(role, content))
+
+    def touch(self):
+        """Mark the session active again, unpacking anything compacted"""
+        self.last_active = time.monotonic()
+        if self.compacted:
+            for message in self:
+                message.inflate()
+            self.compacted = False
+
+    def compact(self):
+        for message in self:
+            if message.role == "assistant":
+                message.compress()
+        self.compacted = True
+
+
+def compact_idle_sessions(sessions: dict, idle_seconds: float = COMPACT_IDLE_SECONDS) -> int:
+    """Compress large assistant replies in sessions idle for `idle_seconds`"""
+    cutoff = time.monotonic() - idle_seconds
+    compacted = 0
+    for history in list(sessions.values()):
+        if not history.compacted and history.last_active < cutoff:
+            history.compact()
+            compacted += 1
+    return compacted
@@ -1,12 +1,28 @@
 from conversation_manager import conversation_manager
+from policy_screen import policy_response, screen_item
+from listing_cache import listing_cache, listing_key
 import json
+import re
 
-def smart_listing_tool(user_input: str, user_id: str = "default") -> dict:
+# Only an explicit ask for a different listing skips the cache; "try again" or
+# "redo" after an error is a retry the cached listing should answer
+REGENERATE_REQUEST = re.compile(
+    r"\b(?:regenerate|(?:give me |write |make )?(?:a )?(?:different|another|new) (?:version|listing|description))\b",
+    re.IGNORECASE
+)
+
+def smart_listing_tool(user_input: str, user_id: str = "default", regenerate: bool = False) -> dict:
     """LLM-powered conversational listing tool that dynamically asks relevant questions"""
     
     session = conversation_manager.get_session(user_id)
     listing_data = session.get("listing_data", {})
     
+    violation = screen_item(user_input)
+    if violation:
+        return policy_violation(violation, user_id)
+    
+    regenerate = regenerate or bool(REGENERATE_REQUEST.search(user_input))
+    
     # Let the LLM decide what to ask based on context
     conversation_prompt = f"""
     You are a helpful marketplace assistant helping a user create a listing.
@@ -48,10 +64,9 @@ def smart_listing_tool(user_input: str, user_id: str = "default") -> dict:
     gemini = GeminiWrapper()
     
     try:
-        llm_response = gemini.generate_response(conversation_prompt)
+        llm_response = gemini.generate_response(conversation_prompt, profile="listing_conversation")
         
         # Extract JSON from LLM response
-        import re
         json_match = re.search(r'\{.*\}', llm_response, re.DOTALL)
         if json_match:
             response_data = json.loads(json_match.group())
@@ -66,7 +81,7 @@ def smart_listing_tool(user_input: str, user_id: str = "default") -> dict:
             
             # Check if listing is ready
             if response_data.get("listing_ready"):
-                return generate_final_listing(listing_data, user_id)
+                return generate_final_listing(listing_data, user_id, regenerate=regenerate)
             
             return {
                 "type": "question",
@@ -86,8 +101,26 @@ def smart_listing_tool(user_input: str, user_id: str = "default") -> dict:
         "conversation_active": True
     }
 
-def generate_final_listing(listing_data: dict, user_id: str) -> dict:
-    """Generate final listing using LLM with collected data"""
+def policy_violation(violation: dict, user_id: str) -> dict:
+    """Stop the listing flow for a prohibited item"""
+    conversation_manager.update_session(user_id, {"state": "initial", "listing_data": {}})
+    return {
+        "type": "policy_violation",
+        "response": policy_response(violation),
+        "item": violation["item"],
+        "conversation_active": False
+    }
+
+def generate_final_listing(listing_data: dict, user_id: str, regenerate: bool = False) -> dict:
+    """Generate final listing using LLM with collected data.
+    
+    Identical listing data from the same user returns the cached listing,
+    unless `regenerate` asks for a fresh one.
+    """
+    
+    violation = screen_item(" ".join(str(value) for value in listing_data.values()))
+    if violation:
+        return policy_violation(violation, user_id)
     
     # Reset conversation
     conversation_manager.update_session(user_id, {
@@ -95,6 +128,14 @@ def generate_final_listing(listing_data: dict, user_id: str) -> dict:
         "current_step": 0
     })
     
+    cache_key = listing_key(user_id, listing_data)
+    if regenerate:
+        listing_cache.note_regeneration()
+    else:
+        cached = listing_cache.get(cache_key)
+        if cached is not None:
+            return final_listing(listing_data, json.loads(cached))
+    
     listing_prompt = f"""
     Create an optimized marketplace listing based on this information:
     {json.dumps(listing_data, indent=2)}
@@ -124,20 +165,17 @@ def generate_final_listing(listing_data: dict, user_id: str) -> dict:
     gemini = GeminiWrapper()
     
     try:
-        llm_response = gemini.generate_response(listing_prompt)
+        llm_response = gemini.generate_response(listing_prompt, profile="listing_json")
         
-        import re
         json_match = re.search(r'\{.*\}', llm_response, re.DOTALL)
         if json_match:
             listing_result = json.loads(json_match.group())
+            # Stored serialized so callers can't mutate the cached copy
+            listing_cache.put(cache_key, json.dumps(listing_result))
+            # A draft is not a listing yet: prices, vocabulary and saved-search
+            # alerts come from /api/listings once the seller publishes it
             
-            return {
-                "type": "final_listing",
-                "success": True,
-                "collected_data": listing_data,
-                "generated_listing": listing_result,
-                "needs_images": True
-            }
+            return final_listing(listing_data, listing_result)
     except Exception as e:
         print(f"Error generating final listing: {e}")
     
@@ -147,3 +185,12 @@ def generate_final_listing(listing_data: dict, user_id: str) -> dict:
         "success": False,
         "message": "I have all your information! Please upload photos of your item to complete the listing."
     }
+
+def final_listing(listing_data: dict, listing_result: dict) -> dict:
+    return {
+        "type": "final_listing",
+        "success": True,
+        "collected_data": listing_data,
+        "generated_listing": listing_result,
+        "needs_images": True
+    }
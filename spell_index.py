@@ -0,0 +1,140 @@
+import re
+import threading
+
+TOKEN = re.compile(r"[a-z0-9]+|[^a-z0-9]+")
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Damerau-Levenshtein distance with adjacent swaps, or limit + 1 if above `limit`"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+class SpellIndex:
+    """Symmetric-delete (SymSpell-style) typo corrector for search queries.
+
+    Every vocabulary word is stored under all of its variants with up to
+    `max_distance` letters deleted. A query token is corrected by looking
+    up its own deletes in that table, so the work depends on the token's
+    length, not the vocabulary size. Words shorter than `long_word` allow
+    one edit and must keep their first letter; longer ones allow two.
+
+    Only words passed to `add` are correction targets. `protect` registers
+    words that are spelled right but are not targets (ordinary English,
+    words from listings), so "tablet" is never turned into "table".
+    """
+
+    def __init__(self, max_distance: int = 2, long_word: int = 8, min_length: int = 4, max_cached: int = 100_000):
+        self.max_distance = max_distance
+        self.long_word = long_word
+        self.min_length = min_length
+        self.max_cached = max_cached
+        self.counts = {}
+        self.known = set()
+        self.deletes = {}
+        self._corrections = {}
+        self._lock = threading.Lock()
+
+    def _variants(self, word: str, depth: int) -> set:
+        variants = {word}
+        frontier = {word}
+        for _ in range(depth):
+            frontier = {w[:i] + w[i + 1:] for w in frontier if len(w) > 1 for i in range(len(w))}
+            variants |= frontier
+        return variants
+
+    def _allowed_distance(self, word: str) -> int:
+        return min(self.max_distance, 2 if len(word) >= self.long_word else 1)
+
+    def add(self, word: str, count: int = 1):
+        """Add a word, or raise its weight when it is already known"""
+        word = word.lower()
+        if not word.isalpha() or len(word) < 3:
+            return
+        with self._lock:
+            new = word not in self.counts
+            # Counted before it is published in `deletes`, which lookups read unlocked
+            self.counts[word] = self.counts.get(word, 0) + count
+            if new:
+                for variant in self._variants(word, self.max_distance):
+                    self.deletes.setdefault(variant, []).append(word)
+                self._corrections.clear()
+
+    def protect(self, *words):
+        """Mark words as correctly spelled without making them targets"""
+        with self._lock:
+            self.known.update(word.lower() for word in words if word)
+            self._corrections.clear()
+
+    def is_known(self, token: str) -> bool:
+        if token in self.counts or token in self.known:
+            return True
+        # Plurals of known words are known too
+        return token.endswith("s") and (token[:-1] in self.counts or token[:-1] in self.known)
+
+    def learn(self, *texts):
+        """Add every word of free text, e.g. titles and tags of new listings"""
+        for text in texts:
+            if text:
+                for word in re.findall(r"[a-z]+", str(text).lower()):
+                    self.add(word)
+
+    def correct_token(self, token: str) -> str:
+        if len(token) < self.min_length or not token.isalpha() or self.is_known(token):
+            return token
+        cached = self._corrections.get(token)
+        if cached is not None:
+            return cached
+
+        limit = self._allowed_distance(token)
+        best, best_distance, best_count = token, limit + 1, 0
+        for variant in self._variants(token, limit):
+            for word in self.deletes.get(variant, ()):
+                if word == best or (len(token) < self.long_word and word[0] != token[0]):
+                    continue
+                distance = edit_distance(token, word, limit)
+                if distance > limit:
+                    continue
+                count = self.counts.get(word, 0)
+                if distance < best_distance or (distance == best_distance and count > best_count):
+                    best, best_distance, best_count = word, distance, count
+
+        if len(self._corrections) >= self.max_cached:
+            self._corrections.clear()
+        self._corrections[token] = best
+        return best
+
+    def correct(self, query: str) -> str:
+        """The query with misspelled words replaced, spacing and numbers kept"""
+        return "".join(self.correct_token(part) if part[0].isalpha() else part
+                       for part in TOKEN.findall(query.lower()))
+
+    def corrections(self, query: str) -> dict:
+        """Misspelled words of the query mapped to their corrections"""
+        corrected = {}
+        for token in re.findall(r"[a-z]+", query.lower()):
+            fixed = self.correct_token(token)
+            if fixed != token:
+                corrected[token] = fixed
+        return corrected
+
+    def correct_batch(self, queries: list) -> list:
+        """Correct many queries; repeats are corrected once"""
+        corrected = {}
+        for query in queries:
+            if query not in corrected:
+                corrected[query] = self.correct(query)
+        return [corrected[query] for query in queries]
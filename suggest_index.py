@@ -0,0 +1,261 @@
+import heapq
+import json
+import logging
+import os
+import re
+import struct
+import threading
+import time
+import zlib
+from array import array
+from bisect import bisect_left, insort
+from price_index import price_index
+from search_parser_tool import BRANDS, CATEGORIES
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"SUGGEST1\n"
+WORD = re.compile(r"[a-z0-9&']+")
+
+
+def normalize_phrase(text: str) -> str:
+    return " ".join(WORD.findall(str(text).lower()))
+
+
+class SuggestIndex:
+    """Frequency-ranked prefix completions over a sorted phrase array.
+
+    Phrases are kept sorted, so the completions of a prefix are one
+    contiguous slice found by binary search. Every prefix whose slice holds
+    more than `precompute_over` phrases gets its top-k precomputed; any
+    other slice is small enough to rank on the fly. Adding a phrase or
+    raising its weight updates the affected top-k lists in place.
+
+    Phrases taken from user queries go through `propose` instead of `add`:
+    they are counted as candidates, in memory only, and join the index once
+    `min_count` uses by `min_users` different users have been seen.
+    """
+
+    def __init__(self, top_k: int = 10, precompute_over: int = 32, min_count: int = 3, min_users: int = 2,
+                 max_candidates: int = 50_000):
+        self.top_k = top_k
+        self.precompute_over = precompute_over
+        self.min_count = min_count
+        self.min_users = min_users
+        self.max_candidates = max_candidates
+        self.candidates = {}
+        self.phrases = []
+        self.weights = {}
+        self.tops = {}
+        self.path = None
+        self._dirty = False
+        self._last_save = 0.0
+        self._lock = threading.Lock()
+
+    def _range(self, prefix: str):
+        return bisect_left(self.phrases, prefix), bisect_left(self.phrases, prefix + "\uffff")
+
+    def _rank(self, phrases) -> list:
+        return heapq.nlargest(self.top_k, phrases, key=lambda phrase: (self.weights[phrase], -len(phrase)))
+
+    def build(self, weights: dict):
+        """Replace the contents with `weights` (phrase -> weight) and precompute top-k lists"""
+        with self._lock:
+            self.weights = {}
+            for phrase, weight in weights.items():
+                phrase = normalize_phrase(phrase)
+                if phrase:
+                    self.weights[phrase] = self.weights.get(phrase, 0.0) + weight
+            self.phrases = sorted(self.weights)
+
+            # Walk prefix lengths, only descending into slices still too large
+            self.tops = {}
+            slices = [(0, len(self.phrases))]
+            length = 1
+            while slices:
+                large = []
+                for lo, hi in slices:
+                    start = lo
+                    while start < hi:
+                        phrase = self.phrases[start]
+                        if len(phrase) < length:
+                            start += 1
+                            continue
+                        end = bisect_left(self.phrases, phrase[:length] + "\uffff", start, hi)
+                        if end - start > self.precompute_over:
+                            self.tops[phrase[:length]] = self._rank(self.phrases[start:end])
+                            large.append((start, end))
+                        start = end
+                slices = large
+                length += 1
+            self._dirty = True
+
+    def add(self, phrase: str, weight: float = 1.0):
+        """Count one more use of `phrase`, adding it if new"""
+        phrase = normalize_phrase(phrase)
+        if not phrase:
+            return
+        with self._lock:
+            if phrase not in self.weights:
+                insort(self.phrases, phrase)
+            self.weights[phrase] = self.weights.get(phrase, 0.0) + weight
+            # Weights only grow, so a phrase can only move up a top-k list
+            for length in range(1, len(phrase) + 1):
+                prefix = phrase[:length]
+                top = self.tops.get(prefix)
+                if top is None:
+                    lo, hi = self._range(prefix)
+                    if hi - lo <= self.precompute_over:
+                        break
+                    self.tops[prefix] = self._rank(self.phrases[lo:hi])
+                    continue
+                if phrase not in top:
+                    top.append(phrase)
+                top[:] = self._rank(top)
+            self._dirty = True
+
+    def propose(self, phrase: str, user_id: str):
+        """Count a phrase from a user's query, promoting it to the index once
+        enough uses by enough users have been seen; later uses count directly"""
+        phrase = normalize_phrase(phrase)
+        if not phrase:
+            return
+        with self._lock:
+            known = phrase in self.weights
+            if not known:
+                candidate = self.candidates.get(phrase)
+                if candidate is None:
+                    if len(self.candidates) >= self.max_candidates:
+                        # One-off phrases go first when the table fills up
+                        self.candidates = {key: value for key, value in self.candidates.items() if value[0] > 1}
+                    candidate = self.candidates[phrase] = [0, set()]
+                candidate[0] += 1
+                candidate[1].add(user_id)
+                if candidate[0] < self.min_count or len(candidate[1]) < self.min_users:
+                    return
+                del self.candidates[phrase]
+                weight = float(candidate[0])
+        self.add(phrase, 1.0 if known else weight)
+
+    def suggest(self, prefix: str, limit: int = None) -> list:
+        """Best completions of `prefix`, highest weight first"""
+        limit = min(limit or self.top_k, self.top_k)
+        normalized = normalize_phrase(prefix)
+        if not normalized:
+            return []
+        # A trailing space means the last word is complete
+        if prefix[-1:].isspace():
+            normalized += " "
+        with self._lock:
+            top = self.tops.get(normalized)
+            if top is None:
+                lo, hi = self._range(normalized)
+                top = self._rank(self.phrases[lo:hi])
+            return top[:limit]
+
+    def __len__(self) -> int:
+        return len(self.phrases)
+
+    def to_bytes(self) -> bytes:
+        """Compact form: sorted phrases, float32 weights, top-k lists as phrase indices"""
+        with self._lock:
+            position = {phrase: i for i, phrase in enumerate(self.phrases)}
+            prefixes = sorted(self.tops)
+            offsets = array("I", [0])
+            indices = array("I")
+            for prefix in prefixes:
+                indices.extend(position[phrase] for phrase in self.tops[prefix])
+                offsets.append(len(indices))
+            weights = array("f", (self.weights[phrase] for phrase in self.phrases))
+
+            blocks = [
+                "\n".join(self.phrases).encode("utf-8"),
+                weights.tobytes(),
+                "\n".join(prefixes).encode("utf-8"),
+                offsets.tobytes(),
+                indices.tobytes()
+            ]
+            header = json.dumps({
+                "top_k": self.top_k,
+                "precompute_over": self.precompute_over
+            }).encode("utf-8")
+        payload = b"".join(struct.pack("<I", len(block)) + block for block in [header] + blocks)
+        return MAGIC + zlib.compress(payload, 6)
+
+    @classmethod
+    def from_bytes(cls, data: bytes, options: dict = None):
+        if not data.startswith(MAGIC):
+            raise ValueError("Not a suggest index file")
+        payload = zlib.decompress(data[len(MAGIC):])
+        blocks = []
+        position = 0
+        while position < len(payload):
+            (size,) = struct.unpack_from("<I", payload, position)
+            blocks.append(payload[position + 4:position + 4 + size])
+            position += 4 + size
+        header, phrase_block, weight_block, prefix_block, offset_block, index_block = blocks
+
+        index = cls(**json.loads(header), **(options or {}))
+        index.phrases = phrase_block.decode("utf-8").split("\n") if phrase_block else []
+        weights = array("f")
+        weights.frombytes(weight_block)
+        index.weights = dict(zip(index.phrases, weights))
+        offsets, indices = array("I"), array("I")
+        offsets.frombytes(offset_block)
+        indices.frombytes(index_block)
+        prefixes = prefix_block.decode("utf-8").split("\n") if prefix_block else []
+        index.tops = {
+            prefix: [index.phrases[i] for i in indices[offsets[n]:offsets[n + 1]]]
+            for n, prefix in enumerate(prefixes)
+        }
+        return index
+
+    def save(self, path: str = None, min_interval: float = 0):
+        path = path or self.path
+        if not path or not self._dirty or time.time() - self._last_save < min_interval:
+            return
+        data = self.to_bytes()
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self._dirty = False
+        self._last_save = time.time()
+
+    @classmethod
+    def load(cls, path: str, seed: dict, **options):
+        """Index from `path` if it exists, else built from the `seed` weights"""
+        if path and os.path.exists(path):
+            try:
+                with open(path, "rb") as f:
+                    index = cls.from_bytes(f.read(), options)
+                index.path = path
+                return index
+            except Exception as e:
+                logger.error(f"Error loading suggest index: {e}")
+        index = cls(**options)
+        index.path = path
+        index.build(seed)
+        return index
+
+
+def vocabulary_seed() -> dict:
+    """Starting weights: search categories, brands, and names from past listings"""
+    seed = {}
+    for word in CATEGORIES:
+        seed[word] = 5.0
+    for category in set(CATEGORIES.values()):
+        seed[category] = 5.0
+    for brand in BRANDS:
+        seed[brand] = 3.0
+    for name in price_index.vocabulary():
+        seed[name] = seed.get(name, 0.0) + 1.0
+    return seed
+
+
+suggest_index = SuggestIndex.load(
+    os.getenv("SUGGEST_INDEX_PATH", "suggest_index.bin"),
+    seed=vocabulary_seed(),
+    min_count=int(os.getenv("SUGGEST_MIN_COUNT", "3")),
+    min_users=int(os.getenv("SUGGEST_MIN_USERS", "2"))
+)
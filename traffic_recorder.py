@@ -0,0 +1,70 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import secrets
+import threading
+
+logger = logging.getLogger(__name__)
+
+EMAIL = re.compile(r"[\w.+-]+@[\w-]+\.[\w.]+")
+PHONE = re.compile(r"(?<!\d)(?:\+?91[\s-]?)?[6-9]\d{4}[\s-]?\d{5}(?!\d)")
+
+
+def anonymize_message(message: str) -> str:
+    """Strip contact details before a message is written to disk"""
+    return PHONE.sub("<phone>", EMAIL.sub("<email>", message))
+
+
+class TrafficRecorder:
+    """Opt-in writer of anonymized per-turn traces to a JSONL file.
+
+    Each line holds the arrival time, a salted hash of the user id, the
+    scrubbed message, the routed intent, per-stage timings and the size of
+    every LLM prompt sent during the turn. replay_traffic.py reads these
+    files back. Without a configured salt a random one is drawn per process,
+    so ids like "anon:<ip>" can't be recovered by hashing guesses; hashes
+    then only stay stable until the next restart.
+    """
+
+    def __init__(self, path: str = None, salt: str = None):
+        self.path = path
+        self.salt = salt or secrets.token_hex(16)
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def hash_user(self, user_id: str) -> str:
+        return hashlib.sha256(f"{self.salt}:{user_id}".encode("utf-8")).hexdigest()[:16]
+
+    def record(self, started_at: float, user_id: str, message: str, image_count: int, turn, timings: dict, status: str):
+        if not self.enabled:
+            return
+        trace = {
+            "ts": round(started_at, 3),
+            "user": self.hash_user(user_id),
+            "message": anonymize_message(message),
+            "images": image_count,
+            "intent": turn.intent if turn else None,
+            "status": status,
+            "timings_ms": {
+                stage: round(seconds * 1000, 1)
+                for stage, seconds in {**(turn.timings if turn else {}), **timings}.items()
+            },
+            "llm_calls": turn.llm_calls if turn else []
+        }
+        line = json.dumps(trace, ensure_ascii=False) + "\n"
+        try:
+            with self._lock, open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+        except Exception as e:
+            logger.error(f"Error recording traffic: {e}")
+
+
+traffic_recorder = TrafficRecorder(
+    path=os.getenv("TRAFFIC_RECORD_PATH"),
+    salt=os.getenv("TRAFFIC_RECORD_SALT")
+)
@@ -0,0 +1,81 @@
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+class GenerationCancelled(Exception):
+    """Raised inside a turn whose answer is no longer wanted"""
+
+
+# Time budget for answering one chat turn, split across its LLM calls
+TURN_DEADLINE_SECONDS = float(os.getenv("TURN_DEADLINE_SECONDS", "30"))
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a turn has used up its time budget"""
+
+
+class TurnContext:
+    """Per-turn state shared between the request handler and GeminiWrapper"""
+
+    def __init__(self, user_id: str = "default", on_token=None, budget: float = None):
+        self.user_id = user_id
+        self.on_token = on_token
+        self.cancelled = threading.Event()
+        # Monotonic time by which the answer must be ready, if any
+        self.deadline = time.monotonic() + budget if budget else None
+        self.intent = None
+        # Set when the user is over their daily token budget
+        self.degraded = False
+        # Seconds per stage and one entry per LLM call, for traffic traces
+        self.timings = {}
+        self.llm_calls = []
+
+    @contextmanager
+    def stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - started
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def check_cancelled(self):
+        if self.cancelled.is_set():
+            raise GenerationCancelled()
+
+    def remaining(self):
+        """Seconds left before the deadline, or None without one"""
+        if self.deadline is None:
+            return None
+        return self.deadline - time.monotonic()
+
+    def timeout_for(self, timeout: float, share: float = 1.0) -> float:
+        """A call's timeout: its own limit, capped at `share` of the time left"""
+        remaining = self.remaining()
+        if remaining is None:
+            return timeout
+        if remaining <= 0:
+            raise DeadlineExceeded()
+        return min(timeout, remaining * share)
+
+
+_current_turn = contextvars.ContextVar("current_turn", default=None)
+
+
+def current_turn():
+    """The TurnContext bound to the running turn, if any"""
+    return _current_turn.get()
+
+
+@contextmanager
+def bind_turn(turn: TurnContext):
+    token = _current_turn.set(turn)
+    try:
+        yield turn
+    finally:
+        _current_turn.reset(token)
@@ -0,0 +1,128 @@
+import json
+import logging
+import os
+import threading
+import time
+from datetime import date
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count, about four bytes of UTF-8 per token"""
+    return max(1, len(text.encode("utf-8")) // 4) if text else 0
+
+
+def estimate_image_tokens(width: int, height: int) -> int:
+    """Gemini's image charge: 258 tokens for small images, else per 768px tile"""
+    if width <= 384 and height <= 384:
+        return 258
+    return 258 * -(-width // 768) * -(-height // 768)
+
+
+class UsageMeter:
+    """Token usage per user, intent and call site.
+
+    Counts are aggregated in memory and appended to a JSONL store every
+    `flush_interval` seconds, one line per (day, user, intent, call site)
+    bucket that changed. Today's per-user totals are reloaded from the store
+    at startup so daily budgets survive restarts.
+    """
+
+    def __init__(self, store_path: str = None, flush_interval: float = 60, daily_budget: int = 0):
+        self.store_path = store_path
+        self.flush_interval = flush_interval
+        self.daily_budget = daily_budget
+        self._pending = {}
+        self._user_today = {}
+        self._call_sites = {}
+        self._day = date.today().isoformat()
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._load_today()
+
+    def _load_today(self):
+        if not self.store_path or not os.path.exists(self.store_path):
+            return
+        try:
+            with open(self.store_path) as f:
+                for line in f:
+                    entry = json.loads(line)
+                    if entry.get("day") == self._day:
+                        tokens = entry["prompt_tokens"] + entry["response_tokens"]
+                        self._user_today[entry["user_id"]] = self._user_today.get(entry["user_id"], 0) + tokens
+        except Exception as e:
+            logger.error(f"Error loading usage store: {e}")
+
+    def _roll_day(self):
+        today = date.today().isoformat()
+        if today != self._day:
+            self._day = today
+            self._user_today = {}
+
+    def record(self, user_id: str, intent: str, call_site: str, prompt_tokens: int, response_tokens: int):
+        with self._lock:
+            self._roll_day()
+            key = (self._day, user_id, intent or "NONE", call_site)
+            bucket = self._pending.setdefault(key, [0, 0, 0])
+            bucket[0] += 1
+            bucket[1] += prompt_tokens
+            bucket[2] += response_tokens
+
+            site = self._call_sites.setdefault(call_site, [0, 0, 0])
+            site[0] += 1
+            site[1] += prompt_tokens
+            site[2] += response_tokens
+
+            self._user_today[user_id] = self._user_today.get(user_id, 0) + prompt_tokens + response_tokens
+
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def tokens_today(self, user_id: str) -> int:
+        self._roll_day()
+        return self._user_today.get(user_id, 0)
+
+    def over_budget(self, user_id: str) -> bool:
+        return self.daily_budget > 0 and self.tokens_today(user_id) >= self.daily_budget
+
+    def flush(self):
+        """Append pending buckets to the store and start a new interval"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+
+        if not pending or not self.store_path:
+            return
+        try:
+            with open(self.store_path, "a") as f:
+                for (day, user_id, intent, call_site), (calls, prompt_tokens, response_tokens) in pending.items():
+                    f.write(json.dumps({
+                        "day": day,
+                        "user_id": user_id,
+                        "intent": intent,
+                        "call_site": call_site,
+                        "calls": calls,
+                        "prompt_tokens": prompt_tokens,
+                        "response_tokens": response_tokens,
+                        "flushed_at": int(time.time())
+                    }) + "\n")
+        except Exception as e:
+            logger.error(f"Error flushing usage store: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "daily_budget": self.daily_budget,
+            "users_today": len(self._user_today),
+            "call_sites": {
+                name: {"calls": calls, "prompt_tokens": prompt_tokens, "response_tokens": response_tokens}
+                for name, (calls, prompt_tokens, response_tokens) in self._call_sites.items()
+            }
+        }
+
+
+usage_meter = UsageMeter(
+    store_path=os.getenv("USAGE_STORE_PATH", "usage_log.jsonl"),
+    flush_interval=float(os.getenv("USAGE_FLUSH_SECONDS", "60")),
+    daily_budget=int(os.getenv("USER_DAILY_TOKEN_BUDGET", "0"))
+)